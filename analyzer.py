@@ -1,65 +1,160 @@
 import pandas as pd
-import xgboost as xgb
-from sklearn.model_selection import train_test_split
-from sklearn.metrics import accuracy_score
+import numpy as np
+import json
 import os
+import time
+from history_store import HISTORY_PATH, load_tail, read_since
+from model_registry import get_model, atomic_save, atomic_save_json
+from predict_server import get_client
+from timing import span
+from tree_compiler import compile_model
 
 MODEL_PATH = "models/xgb_model.pkl"
-DATA_PATH = "data/haoting_data.csv"
+DATA_PATH = HISTORY_PATH
+STATE_PATH = "models/xgb_model.state.json"
+FEATURES = ['局數', '免費遊戲', '小分', '爆發指數']
 
-def train_xgb_model():
-    if not os.path.exists(DATA_PATH):
-        return "❌ 無可用資料訓練模型"
-    df = pd.read_csv(DATA_PATH)
+def _load_state():
+    if not os.path.exists(STATE_PATH):
+        return None
+    with open(STATE_PATH, encoding="utf-8") as f:
+        return json.load(f)
+
+def _save_state(state):
+    atomic_save_json(STATE_PATH, state)
+
+def read_rows_since(offset, chunksize):
+    return read_since(offset, chunksize, DATA_PATH)
+
+def save_checkpoint(offset, rows):
+    st = os.stat(DATA_PATH)
+    _save_state({"offset": offset, "size": st.st_size, "inode": st.st_ino, "rows": rows, "last_full": time.time()})
+
+def _full_train(xgb, start):
+    from sklearn.model_selection import train_test_split
+    from sklearn.metrics import accuracy_score
+
+    columns, df, offset = read_rows_since(0, None)
     if df.empty or '爆金' not in df.columns:
         return "❌ 資料格式錯誤或為空"
-    X = df[['局數', '免費遊戲', '小分', '爆發指數']]
+    X = df[FEATURES]
     y = df['爆金']
     X_train, X_test, y_train, y_test = train_test_split(X, y, test_size=0.2, random_state=42)
     model = xgb.XGBClassifier(use_label_encoder=False, eval_metric='logloss')
     model.fit(X_train, y_train)
-    model.save_model(MODEL_PATH)
+    atomic_save(MODEL_PATH, model.save_model)
     acc = accuracy_score(y_test, model.predict(X_test))
-    return f"✅ 模型訓練完成，測試集準確率：{acc:.2%}"
+    save_checkpoint(offset, len(df))
+    return f"✅ 模型訓練完成，測試集準確率：{acc:.2%}｜處理 {len(df)} 筆｜耗時 {time.perf_counter() - start:.2f}s"
+
+def train_xgb_model(incremental=False, full_rebuild_days=7, chunksize=50000, rounds_per_chunk=10):
+    import xgboost as xgb
+
+    if not os.path.exists(DATA_PATH):
+        return "❌ 無可用資料訓練模型"
+    start = time.perf_counter()
+    state = _load_state()
+    # 沒有檢查點、到了定期重建時間、或資料檔被截短改寫時，改為完整重新訓練
+    if (not incremental or state is None or not os.path.exists(MODEL_PATH)
+            or time.time() - state["last_full"] > full_rebuild_days * 86400
+            or os.path.getsize(DATA_PATH) < state["size"]
+            or os.stat(DATA_PATH).st_ino != state.get("inode", os.stat(DATA_PATH).st_ino)):
+        with span("train_full"):
+            return _full_train(xgb, start)
+
+    columns, chunks, offset = read_rows_since(state["offset"], chunksize)
+    if '爆金' not in columns:
+        return "❌ 資料格式錯誤或為空"
+    model = load_jackpot_model()
+    params = model.get_xgb_params()
+    booster = model.get_booster()
+    rows = 0
+    for chunk in chunks:
+        with span("train_chunk"):
+            dtrain = xgb.DMatrix(chunk[FEATURES], label=chunk['爆金'])
+            booster = xgb.train(params, dtrain, num_boost_round=rounds_per_chunk, xgb_model=booster)
+        rows += len(chunk)
+    if rows:
+        atomic_save(MODEL_PATH, booster.save_model)
+    _save_state({**state, "offset": offset, "size": os.path.getsize(DATA_PATH), "inode": os.stat(DATA_PATH).st_ino,
+                 "rows": state["rows"] + rows})
+    return f"✅ 增量訓練完成｜新增 {rows} 筆（累計 {state['rows'] + rows} 筆）｜耗時 {time.perf_counter() - start:.2f}s"
+
+def _load_xgb(path):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(path)
+    return model
+
+def load_jackpot_model():
+    return get_model(MODEL_PATH, _load_xgb)
+
+def load_compiled_jackpot_model():
+    return get_model(MODEL_PATH, lambda path: compile_model(_load_xgb(path)), kind="compiled")
 
 def predict_jackpot(input_data):
     if not os.path.exists(MODEL_PATH):
         return -1, "❌ 尚未訓練模型"
-    model = xgb.XGBClassifier()
-    model.load_model(MODEL_PATH)
-    input_df = pd.DataFrame([input_data])
-    prob = model.predict_proba(input_df)[0][1]
+    client = get_client()
+    with span("jackpot_predict"):
+        if client is not None:
+            prob = float(client.predict("jackpot", [[input_data[f] for f in FEATURES]])[0])
+        else:
+            input_df = pd.DataFrame([input_data])
+            prob = load_compiled_jackpot_model().predict_proba(input_df)[0][1]
     pred = int(prob > 0.5)
     return pred, prob
 
-def simulate_ai_play(capital=1000, rounds=50, bet_unit=10):
+def round_pnl(probs, outcomes, bet_unit=10, threshold=0.7, payout=4):
+    # 下注規則：機率高於門檻才下注，爆金贏 bet_unit × payout、未爆輸 bet_unit；回測、蒙地卡羅與參數掃描共用
+    bet = probs > threshold
+    hit = bet & (np.asarray(outcomes) == 1)
+    # 注額與賠率皆為整數時維持整數損益，否則保留小數
+    dtype = np.result_type(np.int64, np.asarray(bet_unit), np.asarray(payout))
+    pnl = np.where(hit, bet_unit * payout, np.where(bet, -bet_unit, 0)).astype(dtype)
+    return bet, hit, pnl
+
+def backtest_ai_play(df, model, capital=1000, bet_unit=10, threshold=0.7, payout=4):
+    # 一次批次預測全部局數，再以向量運算計算資金曲線
+    if len(df):
+        with span("backtest_predict"):
+            probs = model.predict_proba(df[FEATURES])[:, 1]
+    else:
+        probs = np.empty(0, dtype=np.float32)
+    bet, hit, pnl = round_pnl(probs, df['爆金'].to_numpy(), bet_unit, threshold, payout)
+    return pd.DataFrame({
+        '局': df.index.to_numpy() + 1,
+        '爆金率': probs,
+        '下注': bet,
+        '爆金': hit,
+        '損益': pnl,
+        '資金': capital + np.cumsum(pnl),
+    }, index=df.index)
+
+def format_backtest(result, capital, rounds):
+    logs = []
+    for i, prob, bet, hit, balance in zip(result['局'].tolist(), result['爆金率'].tolist(),
+                                         result['下注'].tolist(), result['爆金'].tolist(),
+                                         result['資金'].tolist()):
+        if not bet:
+            logs.append(f"第{i}局｜爆金率：{prob:.2%}｜🔍 觀望｜資金：${balance}")
+        elif hit:
+            logs.append(f"第{i}局｜爆金率：{prob:.2%}｜✅ 爆金｜資金：${balance}")
+        else:
+            logs.append(f"第{i}局｜爆金率：{prob:.2%}｜❌ 未爆｜資金：${balance}")
+    hit_count = int(result['爆金'].sum())
+    balance = result['資金'].iloc[-1] if len(result) else capital
+    return logs, f"📊 命中次數：{hit_count}／{rounds} 局｜最終結餘：${balance}"
+
+def simulate_ai_play(capital=1000, rounds=50, bet_unit=10, as_frame=False):
     try:
-        df = pd.read_csv(DATA_PATH).tail(rounds)
+        df = load_tail(rounds, DATA_PATH)
     except:
         return "❌ 模擬失敗，請確認資料是否存在"
-    model = xgb.XGBClassifier()
-    model.load_model(MODEL_PATH)
-    logs = []
-    balance = capital
-    hit_count = 0
-    for i, row in df.iterrows():
-        input_df = pd.DataFrame([{
-            '局數': row['局數'],
-            '免費遊戲': row['免費遊戲'],
-            '小分': row['小分'],
-            '爆發指數': row['爆發指數']
-        }])
-        prob = model.predict_proba(input_df)[0][1]
-        should_bet = prob > 0.7
-        if should_bet:
-            if row['爆金'] == 1:
-                balance += bet_unit * 4
-                hit_count += 1
-                logs.append(f"第{i+1}局｜爆金率：{prob:.2%}｜✅ 爆金｜資金：${balance}")
-            else:
-                balance -= bet_unit
-                logs.append(f"第{i+1}局｜爆金率：{prob:.2%}｜❌ 未爆｜資金：${balance}")
-        else:
-            logs.append(f"第{i+1}局｜爆金率：{prob:.2%}｜🔍 觀望｜資金：${balance}")
-    summary = f"📊 命中次數：{hit_count}／{rounds} 局｜最終結餘：${balance}"
+    model = load_jackpot_model()
+    result = backtest_ai_play(df, model, capital, bet_unit)
+    if as_frame:
+        return result
+    logs, summary = format_backtest(result, capital, rounds)
     return "\n".join(logs + ["", summary])
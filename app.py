@@ -1,41 +1,45 @@
 import streamlit as st
-import requests
 import pandas as pd
 from datetime import datetime
-from bs4 import BeautifulSoup
-import joblib
-import numpy as np
-import re
-import os
-from replay_analyzer import analyze_replay_url
+from pipeline import load_predictor, normalize_payload
+from jobs import JobManager
+import timing
+from response_cache import get_cache
 
 st.set_page_config(page_title="賽特分析系統 - 自動序號工具", layout="centered")
 st.title("🔑 賽特序號自動分析工具 v2.6")
 st.markdown("請輸入每日序號與帳號資訊，系統將自動送出分析請求、擷取爆金圖片與影片回放網址，結合 AI 預測與下注建議，並持續記錄強化學習。")
 
+STATUS_LABEL = {"queued": "⏳ 排隊中", "running": "🔄 分析中", "done": "✅ 完成", "error": "❌ 錯誤"}
+
+
 @st.cache_resource
+def get_job_manager():
+    # 跨 session 共用的背景工作池；送出後立即返回，結果由下方區塊輪詢顯示
+    return JobManager(max_workers=4)
 
-def load_model():
-    try:
-        return joblib.load("xgb_burst_predictor.pkl")
-    except:
-        return None
-
-def save_daily_training_data(record):
-    file = "daily_training_log.csv"
-    df = pd.DataFrame([record])
-    if os.path.exists(file):
-        df.to_csv(file, mode="a", header=False, index=False)
-    else:
-        df.to_csv(file, index=False)
 
-def make_betting_decision(prob, threshold=0.6):
-    if prob >= threshold:
-        return f"✅ 建議下注（信心值 {prob*100:.1f}%）"
+model = load_predictor()
+manager = get_job_manager()
+st.session_state.setdefault("job_ids", [])
+
+with st.sidebar:
+    st.markdown("### ⏱️ 各階段耗時")
+    stats = timing.summary()
+    if stats:
+        st.dataframe(pd.DataFrame(stats).T.round(2))
     else:
-        return f"⛔ 建議觀望（信心值 {prob*100:.1f}%）"
+        st.caption("尚無計時資料")
+    cache_stats = get_cache().stats()
+    st.caption(f"結果快取命中率 {cache_stats['hit_rate']:.1%}（{cache_stats['size']} 筆）")
+    st.checkbox("下一次分析啟用 cProfile", key="profile_next")
+
+
+def consume_profile():
+    # 只分析下一次送出：送出時取走勾選狀態並取消勾選（需在 callback 內修改 widget 的值）
+    st.session_state.profile_request = st.session_state.profile_next
+    st.session_state.profile_next = False
 
-model = load_model()
 
 with st.form("serial_form"):
     serial = st.text_input("今日序號", placeholder="例如：115511")
@@ -44,102 +48,98 @@ with st.form("serial_form"):
     table = st.text_input("桌號", value="109")
     device = st.selectbox("裝置類型", ["ios", "android", "pc"])
     game = st.selectbox("選擇遊戲", ["ATG-賽特", "ATG-其他"])
-    submitted = st.form_submit_button("🚀 開始分析")
+    refresh = st.checkbox("略過快取，重新查詢")
+    submitted = st.form_submit_button("🚀 開始分析", on_click=consume_profile)
 
 if submitted:
-    with st.spinner("正在提交序號並擷取分析結果..."):
-        payload = {
-            "serial": serial,
-            "device": device,
-            "account": account,
-            "amount": amount,
-            "game": game,
-            "table": table
-        }
-        try:
-            res = requests.post("https://haoting.info/verifySerial.php", data=payload)
-            if res.status_code == 200:
-                soup = BeautifulSoup(res.text, "html.parser")
-                icons = soup.find_all("img")
-                links = soup.find_all("a", href=True)
-
-                results = []
-                level_map = {
-                    "無爆發": 0,
-                    "Big Win": 1,
-                    "Super Win": 2,
-                    "Mega Win": 3,
-                    "Ultra Win": 4,
-                    "Legendary Win": 5,
-                }
-
-                for icon in icons:
-                    src = icon.get("src")
-                    if src:
-                        if "legendary" in src.lower():
-                            win_type = "Legendary Win"
-                        elif "ultra" in src.lower():
-                            win_type = "Ultra Win"
-                        elif "mega" in src.lower():
-                            win_type = "Mega Win"
-                        elif "super" in src.lower():
-                            win_type = "Super Win"
-                        elif "big" in src.lower():
-                            win_type = "Big Win"
-                        else:
-                            win_type = "無爆發"
-
-                        results.append({
-                            "時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "爆發等級": win_type,
-                            "圖片": src,
-                            "數值": level_map.get(win_type, 0)
-                        })
-
-                replay_urls = []
-                for a in links:
-                    href = a["href"]
-                    if "godeebxp.com/egames" in href and "egyptian-mythology" in href:
-                        replay_urls.append(href)
-
-                if results:
-                    df = pd.DataFrame(results)
-                    st.success("🎉 爆金資料擷取成功！")
-                    st.dataframe(df)
-                    csv = df.to_csv(index=False).encode("utf-8")
-                    st.download_button("📥 下載結果 CSV", data=csv, file_name="haoting_data.csv", mime="text/csv")
-
-                    if model:
-                        X_input = np.array(df["數值"].tail(5)).reshape(1, -1)
-                        if X_input.shape[1] < 5:
-                            X_input = np.pad(X_input, ((0,0),(5-X_input.shape[1],0)))
-                        pred = model.predict_proba(X_input)[0][1]
-                        decision = make_betting_decision(pred)
-
-                        st.markdown(f"### 🤖 AI 預測下一局爆金機率：**{pred*100:.2f}%**")
-                        st.markdown(f"### 💰 自動下注建議：{decision}")
-
-                        save_daily_training_data({
-                            "日期時間": datetime.now().strftime("%Y-%m-%d %H:%M:%S"),
-                            "序號": serial,
-                            "帳號": account,
-                            "爆發分數陣列": df["數值"].tolist(),
-                            "爆金機率": round(pred, 4),
-                            "下注建議": decision
-                        })
-                    else:
-                        st.warning("尚未載入 AI 模型，請確認 xgb_burst_predictor.pkl 存在於目錄中。")
-                else:
-                    st.warning("未偵測到爆金資訊圖片，可能本次無爆發等級資料。")
-
-                if replay_urls:
-                    st.markdown("---")
-                    st.markdown("### 🎞️ 偵測到回放網址：")
-                    for url in replay_urls:
-                        label = analyze_replay_url(url)
-                        st.write(f"{url} 👉 分析結果：**{label}**")
-
-            else:
-                st.error(f"分析失敗，狀態碼：{res.status_code}")
-        except Exception as e:
-            st.error(f"發生錯誤：{e}")
+    payload = normalize_payload({
+        "serial": serial,
+        "device": device,
+        "account": account,
+        "amount": amount,
+        "game": game,
+        "table": table
+    })
+    profile = st.session_state.pop("profile_request", False)
+    job_id = manager.submit(payload, profile=profile, model=model, refresh=refresh)
+    st.session_state.job_ids.insert(0, job_id)
+    st.toast(f"已送出分析工作 {job_id}")
+
+
+def render_result(job):
+    result = job["result"]
+    if job["status"] == "error":
+        st.error(f"發生錯誤：{job['error']}")
+        return
+    if result is None:
+        st.caption("等待分析結果...")
+        return
+    if result["status"] != 200:
+        st.error(f"分析失敗，狀態碼：{result['status']}")
+        return
+    if result.get("cached"):
+        st.info("⚡ 使用快取結果（勾選「略過快取」可重新查詢）")
+
+    if "rounds" in job["stages"]:
+        if result["rounds"]:
+            df = pd.DataFrame(result["rounds"])
+            st.success("🎉 爆金資料擷取成功！")
+            st.dataframe(df)
+            csv = df.to_csv(index=False).encode("utf-8")
+            st.download_button("📥 下載結果 CSV", data=csv, file_name="haoting_data.csv", mime="text/csv",
+                               key=f"download-{job['id']}")
+        else:
+            st.warning("未偵測到爆金資訊圖片，可能本次無爆發等級資料。")
+
+    if "prediction" not in job["stages"]:
+        st.caption("🤖 AI 預測中...")
+    elif result["rounds"]:
+        if result["prob"] is not None:
+            st.markdown(f"### 🤖 AI 預測下一局爆金機率：**{result['prob']*100:.2f}%**")
+            st.markdown(f"### 💰 自動下注建議：{result['decision']}")
+        else:
+            st.warning("尚未載入 AI 模型，請確認 xgb_burst_predictor.pkl 存在於目錄中。")
+
+    if "replays" not in job["stages"]:
+        st.caption("🎞️ 回放分析中...")
+    elif result["replays"]:
+        st.markdown("---")
+        st.markdown("### 🎞️ 偵測到回放網址：")
+        for url, label in result["replays"]:
+            st.write(f"{url} 👉 分析結果：**{label}**")
+
+    if job["profile"]:
+        with st.expander("cProfile 結果"):
+            st.code(job["profile"])
+
+
+in_flight = manager.in_flight(st.session_state.job_ids)
+
+
+@st.fragment(run_every=1 if in_flight else None)
+def render_jobs():
+    jobs = manager.jobs(st.session_state.job_ids)
+    if not jobs:
+        return
+    st.markdown("---")
+    st.markdown("### 📋 分析工作")
+    st.dataframe(pd.DataFrame([{
+        "工作": job["id"],
+        "送出時間": datetime.fromtimestamp(job["created"]).strftime("%H:%M:%S"),
+        "序號": job["payload"]["serial"],
+        "帳號": job["payload"]["account"],
+        "桌號": job["payload"].get("table", ""),
+        "狀態": STATUS_LABEL[job["status"]],
+        "爆金率": f"{job['result']['prob']*100:.2f}%" if job["result"] and job["result"]["prob"] is not None else "",
+        "耗時(秒)": round(job["elapsed"], 2),
+    } for job in jobs]), hide_index=True)
+    for i, job in enumerate(jobs):
+        title = f"{STATUS_LABEL[job['status']]}　{job['id']}　序號 {job['payload']['serial']}"
+        with st.expander(title, expanded=i == 0):
+            render_result(job)
+    # 所有工作結束後整頁重跑一次，停止輪詢並更新側邊欄計時
+    if in_flight and not manager.in_flight(st.session_state.job_ids):
+        st.rerun()
+
+
+render_jobs()
@@ -0,0 +1,34 @@
+# 量測 simulate_ai_play 在大型合成歷史資料上的耗時：python -m benchmarks.bench_backtest
+import os
+import tempfile
+import time
+
+from benchmarks.bench_partition_store import make_history
+
+
+def run(n_rows=200_000, rounds=(50, 100_000)):
+    import analyzer
+
+    results = {}
+    cwd = os.getcwd()
+    with tempfile.TemporaryDirectory() as tmp:
+        os.chdir(tmp)
+        try:
+            os.makedirs("data")
+            os.makedirs("models")
+            make_history(n_rows, n_days=200).to_csv(analyzer.DATA_PATH, index=False)
+            start = time.perf_counter()
+            analyzer.train_xgb_model()
+            results[f"train_full_{n_rows}"] = time.perf_counter() - start
+            for n in rounds:
+                start = time.perf_counter()
+                analyzer.simulate_ai_play(rounds=n)
+                results[f"simulate_ai_play_{n}"] = time.perf_counter() - start
+        finally:
+            os.chdir(cwd)
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        print(f"{name:<28}{seconds * 1000:10.1f} ms")
@@ -0,0 +1,76 @@
+# 比較 verify_parser 與原本 BeautifulSoup 擷取方式：python -m benchmarks.bench_extract
+import random
+import time
+
+from verify_parser import extract_verify_response
+
+TIERS = ["legendary", "ultra", "mega", "super", "big", "none"]
+
+
+def make_verify_html(n_icons, n_links, seed=0):
+    rng = random.Random(seed)
+    parts = ["<html><head><title>verify</title><script>var x = '<img src=\"fake.png\">';</script></head><body><table>"]
+    for i in range(n_icons):
+        tier = rng.choice(TIERS)
+        parts.append(f'<tr><td>{i}</td><td><img class="icon" src="/static/img/{tier.upper() if i % 7 == 0 else tier}_win_{i}.png" alt="{tier}"></td></tr>')
+        if i % 3 == 0:
+            game = "egyptian-mythology" if rng.random() < 0.7 else "other-game"
+            parts.append(f'<tr><td><a href="https://godeebxp.com/egames/{game}/replay?id={i}&amp;tier={tier}">replay</a></td></tr>')
+    for i in range(n_links):
+        parts.append(f'<p><a href="https://haoting.info/page/{i}">link {i}</a></p>')
+    parts.append("<!-- <img src=\"commented_mega.png\"> --></table></body></html>")
+    return "".join(parts)
+
+
+def extract_bs4(html):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    icons = []
+    for icon in soup.find_all("img"):
+        src = icon.get("src")
+        if src:
+            if "legendary" in src.lower():
+                win_type = "Legendary Win"
+            elif "ultra" in src.lower():
+                win_type = "Ultra Win"
+            elif "mega" in src.lower():
+                win_type = "Mega Win"
+            elif "super" in src.lower():
+                win_type = "Super Win"
+            elif "big" in src.lower():
+                win_type = "Big Win"
+            else:
+                win_type = "無爆發"
+            icons.append((src, win_type))
+    replay_urls = []
+    for a in soup.find_all("a", href=True):
+        href = a["href"]
+        if "godeebxp.com/egames" in href and "egyptian-mythology" in href:
+            replay_urls.append(href)
+    return icons, replay_urls
+
+
+def _best_of(fn, arg, repeat):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        fn(arg)
+        best = min(best, time.perf_counter() - start)
+    return best
+
+
+def run(sizes=(10, 1000, 5000), repeat=3, compare=True):
+    results = {}
+    for n in sizes:
+        html = make_verify_html(n, n // 2)
+        results[f"extract_stream_{n}"] = _best_of(extract_verify_response, html, repeat)
+        if compare:
+            assert extract_verify_response(html) == extract_bs4(html)
+            results[f"extract_bs4_{n}"] = _best_of(extract_bs4, html, repeat)
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        print(f"{name:<28}{seconds * 1000:10.3f} ms")
@@ -0,0 +1,31 @@
+# 量測蒙地卡羅資金模擬每秒可產生的路徑數：python -m benchmarks.bench_monte_carlo
+import time
+
+import numpy as np
+
+from analyzer import round_pnl
+from monte_carlo import simulate_paths
+
+
+def make_pnl(n_rows=100000, seed=0):
+    rng = np.random.default_rng(seed)
+    probs = rng.random(n_rows)
+    outcomes = (rng.random(n_rows) < probs * 0.5).astype(int)
+    return round_pnl(probs, outcomes)[2]
+
+
+def run(n_paths=50000, rounds=200, shards=(1, 4)):
+    pnl = make_pnl()
+    results = {}
+    for n in shards:
+        start = time.perf_counter()
+        simulate_paths(pnl, n_paths, rounds, capital=1000, block=5, seed=0, shards=n)
+        elapsed = time.perf_counter() - start
+        results[f"monte_carlo_{n_paths}x{rounds}_shards{n}"] = elapsed
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        n_paths = int(name.split("_")[2].split("x")[0])
+        print(f"{name:<40}{seconds:8.3f} s  {n_paths / seconds:12,.0f} paths/s")
@@ -0,0 +1,56 @@
+# 比較 CSV 與日期分區儲存的「最後 N 局」與日期區間讀取：python -m benchmarks.bench_partition_store [rows]
+import os
+import sys
+import tempfile
+import time
+
+import numpy as np
+import pandas as pd
+
+import partition_store
+
+
+def make_history(n_rows, n_days=1000, seed=0):
+    rng = np.random.default_rng(seed)
+    days = pd.date_range("2022-01-01", periods=n_days).strftime("%Y-%m-%d").to_numpy()
+    plays = rng.integers(0, 400, n_rows)
+    small = rng.integers(0, 2, n_rows)
+    free = rng.integers(0, 2, n_rows)
+    return pd.DataFrame({
+        "日期": days[np.sort(rng.integers(0, n_days, n_rows))],
+        "局數": plays,
+        "爆金": rng.integers(0, 2, n_rows),
+        "小分": small,
+        "免費遊戲": free,
+        "爆發指數": np.round(plays * 0.05 + small * 10 + free * 50, 2),
+    })
+
+
+def _timed(fn):
+    start = time.perf_counter()
+    fn()
+    return time.perf_counter() - start
+
+
+def run(n_rows=1_000_000):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        csv_path = os.path.join(tmp, "history.csv")
+        root = os.path.join(tmp, "parts")
+        make_history(n_rows).to_csv(csv_path, index=False)
+        results["partition_migrate"] = _timed(lambda: partition_store.migrate_from_csv([csv_path], root))
+        results["csv_tail_50"] = _timed(lambda: pd.read_csv(csv_path).tail(50))
+        results["partition_tail_50"] = _timed(lambda: partition_store.read_tail(50, root))
+        results["csv_range_7d"] = _timed(
+            lambda: (lambda df: df[(df["日期"] >= "2022-06-01") & (df["日期"] <= "2022-06-07")])(pd.read_csv(csv_path)))
+        results["partition_range_7d"] = _timed(lambda: partition_store.read_range("2022-06-01", "2022-06-07", root))
+        tail = partition_store.read_tail(50, root)
+        expected = pd.read_csv(csv_path).tail(50)
+        assert (tail["局數"].to_numpy() == expected["局數"].to_numpy()).all()
+    return results
+
+
+if __name__ == "__main__":
+    rows = int(sys.argv[1]) if len(sys.argv) > 1 else 10_000_000
+    for name, seconds in run(rows).items():
+        print(f"{name:<22}{seconds * 1000:12.1f} ms")
@@ -0,0 +1,83 @@
+# 預測服務壓力測試：多執行緒單筆請求的吞吐量與尾端延遲，並與各自在行程內評分比較
+# python -m benchmarks.bench_predict_server [--addr HOST:PORT] [--clients 32] [--requests 200]
+import argparse
+import multiprocessing
+import threading
+import time
+
+import numpy as np
+
+from benchmarks.bench_tree_eval import make_burst_model
+from predict_server import DEFAULT_ADDR, PredictClient, make_server
+
+
+def _burst_scorers():
+    model, _ = make_burst_model()
+    return {"burst": lambda X: model.predict_proba(X)[:, 1]}
+
+
+def _serve(addr, max_batch, max_wait, ready):
+    server = make_server(addr, max_batch, max_wait, scorers=_burst_scorers(), widths={"burst": 5})
+    ready.set()
+    server.serve_forever()
+
+
+def _load(predict, clients, requests, seed=0):
+    rows = np.random.default_rng(seed).integers(0, 6, (requests, 5)).tolist()
+    latencies = [[] for _ in range(clients)]
+
+    def worker(i):
+        for row in rows:
+            start = time.perf_counter()
+            predict([row])
+            latencies[i].append(time.perf_counter() - start)
+
+    threads = [threading.Thread(target=worker, args=(i,)) for i in range(clients)]
+    start = time.perf_counter()
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    elapsed = time.perf_counter() - start
+    lat = np.concatenate(latencies) * 1000
+    return {
+        "throughput": clients * requests / elapsed,
+        "p50_ms": float(np.percentile(lat, 50)),
+        "p95_ms": float(np.percentile(lat, 95)),
+        "p99_ms": float(np.percentile(lat, 99)),
+    }
+
+
+def run(addr=None, clients=32, requests=200, max_batch=64, max_wait=0.002):
+    results = {}
+    scorers = _burst_scorers()
+    results["in_process"] = _load(scorers["burst"], clients, requests)
+    proc = None
+    if addr is None:
+        # 服務放在獨立行程，避免與壓測執行緒搶 GIL
+        addr = DEFAULT_ADDR
+        ready = multiprocessing.Event()
+        proc = multiprocessing.Process(target=_serve, args=(addr, max_batch, max_wait, ready), daemon=True)
+        proc.start()
+        ready.wait(60)
+    try:
+        client = PredictClient(addr, retry_after=60, scorers=scorers)
+        results["server"] = _load(lambda rows: client.predict("burst", rows), clients, requests)
+        results["server"]["fallback"] = client.fallback
+    finally:
+        if proc is not None:
+            proc.terminate()
+    return results
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="預測服務壓力測試")
+    parser.add_argument("--addr", default=None, help="已啟動的服務位址；未指定時自動啟動測試服務")
+    parser.add_argument("--clients", type=int, default=32)
+    parser.add_argument("--requests", type=int, default=200, help="每個 client 的請求數")
+    parser.add_argument("--max-batch", type=int, default=64)
+    parser.add_argument("--max-wait-ms", type=float, default=2.0)
+    args = parser.parse_args()
+    for name, stats in run(args.addr, args.clients, args.requests, args.max_batch, args.max_wait_ms / 1000).items():
+        print(f"{name:<12}{stats['throughput']:10.0f} 筆/秒  p50 {stats['p50_ms']:7.2f}ms  "
+              f"p95 {stats['p95_ms']:7.2f}ms  p99 {stats['p99_ms']:7.2f}ms")
@@ -0,0 +1,40 @@
+# 量測離線解析賽特頁面表格的速度：python -m benchmarks.bench_scraper_parse
+import os
+import random
+import tempfile
+import time
+
+from scraper_haoting import parse_snapshot
+
+NOTES = ["", "小分", "免費遊戲", "小分 免費遊戲"]
+
+
+def make_haoting_html(n_rows, seed=0):
+    rng = random.Random(seed)
+    parts = ["<html><body><table><tr><th>時間</th><th>局數</th><th>狀態</th><th>結果</th><th>備註</th></tr>"]
+    for i in range(n_rows):
+        parts.append(
+            f"<tr><td>{i}</td><td> {rng.randrange(0, 400)} </td><td>{rng.choice(NOTES)}</td>"
+            f"<td>{'爆' if rng.random() < 0.3 else '-'}</td><td>-</td></tr>"
+        )
+    parts.append("</table></body></html>")
+    return "".join(parts)
+
+
+def run(sizes=(100, 2000, 10000)):
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for n in sizes:
+            path = os.path.join(tmp, f"haoting_{n}.html")
+            with open(path, "w", encoding="utf-8") as f:
+                f.write(make_haoting_html(n))
+            start = time.perf_counter()
+            df = parse_snapshot(path, date="2025-01-01")
+            results[f"scraper_parse_{n}"] = time.perf_counter() - start
+            assert len(df) == n
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        print(f"{name:<24}{seconds * 1000:10.1f} ms")
@@ -0,0 +1,47 @@
+# 以 python -X importtime 量測各模組冷啟動匯入時間並檢查預算：python -m benchmarks.bench_startup
+import os
+import subprocess
+import sys
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# 單位：秒；streamlit 本身不計入，只量測本專案模組與其相依套件
+BUDGETS = {
+    "replay_utils": 0.02,
+    "replay_analyzer": 0.02,
+    "verify_parser": 0.03,
+    "training_log": 0.3,
+    "http_client": 0.4,
+    "pipeline": 0.8,
+    "analyzer": 1.0,
+    "scraper_haoting": 1.0,
+}
+
+
+def import_time(module, repeat=3):
+    best = float("inf")
+    for _ in range(repeat):
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+            cwd=ROOT, capture_output=True, text=True, check=True,
+        )
+        # importtime 輸出格式：import time: self [us] | cumulative | imported package
+        for line in proc.stderr.splitlines():
+            parts = [p.strip() for p in line.split("|")]
+            if len(parts) == 3 and parts[2] == module:
+                best = min(best, int(parts[1]) / 1e6)
+    return best
+
+
+def run(budgets=BUDGETS):
+    return {f"import_{module}": import_time(module) for module in budgets}
+
+
+if __name__ == "__main__":
+    over = 0
+    for module, budget in BUDGETS.items():
+        seconds = import_time(module)
+        flag = "OK" if seconds <= budget else "OVER"
+        over += flag == "OVER"
+        print(f"{module:<18}{seconds * 1000:9.1f} ms  (budget {budget * 1000:.0f} ms)  {flag}")
+    sys.exit(1 if over else 0)
@@ -0,0 +1,32 @@
+# 量測訓練紀錄的附加寫入與整批讀取：python -m benchmarks.bench_training_log
+import os
+import tempfile
+import time
+
+import numpy as np
+
+from training_log import TrainingLogWriter, read_training_log
+
+
+def run(n_records=100_000, flush_every=(1, 256)):
+    rng = np.random.default_rng(0)
+    tiers = [rng.integers(0, 6, rng.integers(1, 12)).tolist() for _ in range(1000)]
+    results = {}
+    with tempfile.TemporaryDirectory() as tmp:
+        for flush in flush_every:
+            path = os.path.join(tmp, f"log_{flush}")
+            n = n_records if flush > 1 else n_records // 50
+            start = time.perf_counter()
+            with TrainingLogWriter(path, flush_every=flush, fsync=False) as writer:
+                for i in range(n):
+                    writer.append("115511", "moneymm258", tiers[i % 1000], 0.5, i % 2, table="109")
+            results[f"log_append_flush{flush}_per_record"] = (time.perf_counter() - start) / n
+        start = time.perf_counter()
+        records, _ = read_training_log(os.path.join(tmp, f"log_{max(flush_every)}"))
+        results[f"log_read_{len(records)}"] = time.perf_counter() - start
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        print(f"{name:<34}{seconds * 1e6:12.1f} us")
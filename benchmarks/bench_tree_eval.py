@@ -0,0 +1,61 @@
+# 比較編譯後的樹陣列與 XGBoost predict_proba 的結果與單筆延遲：python -m benchmarks.bench_tree_eval
+import time
+
+import numpy as np
+
+from tree_compiler import compile_model
+
+JACKPOT_FEATURES = ['局數', '免費遊戲', '小分', '爆發指數']
+
+
+def make_burst_model(n_rows=5000, seed=0):
+    import xgboost as xgb
+
+    rng = np.random.default_rng(seed)
+    X = rng.integers(0, 6, (n_rows, 5))
+    y = (X[:, -1] + X[:, -2] + rng.integers(0, 4, n_rows) > 6).astype(int)
+    model = xgb.XGBClassifier(n_estimators=100, max_depth=4)
+    model.fit(X, y)
+    return model, X
+
+
+def make_jackpot_model(n_rows=5000, seed=0):
+    import pandas as pd
+    import xgboost as xgb
+
+    rng = np.random.default_rng(seed)
+    plays = rng.integers(0, 300, n_rows)
+    small = rng.integers(0, 2, n_rows)
+    free = rng.integers(0, 2, n_rows)
+    X = pd.DataFrame({'局數': plays, '免費遊戲': free, '小分': small,
+                      '爆發指數': np.round(plays * 0.05 + small * 10 + free * 50, 2)})
+    y = (rng.random(n_rows) < 0.3 + 0.4 * free).astype(int)
+    model = xgb.XGBClassifier(eval_metric='logloss')
+    model.fit(X, y)
+    return model, X
+
+
+def _per_call(fn, arg, calls):
+    start = time.perf_counter()
+    for _ in range(calls):
+        fn(arg)
+    return (time.perf_counter() - start) / calls
+
+
+def run(calls=500):
+    results = {}
+    for name, (model, X) in (("burst", make_burst_model()), ("jackpot", make_jackpot_model())):
+        compiled = compile_model(model)
+        diff = np.abs(compiled.predict_proba(X)[:, 1] - model.predict_proba(X)[:, 1]).max()
+        assert diff < 1e-5, f"{name} 預測差異過大：{diff}"
+        row = X[:1]
+        results[f"{name}_xgb_single"] = _per_call(model.predict_proba, row, calls)
+        results[f"{name}_compiled_single"] = _per_call(compiled.predict_proba, row, calls)
+        results[f"{name}_xgb_batch"] = _per_call(model.predict_proba, X, 5)
+        results[f"{name}_compiled_batch"] = _per_call(compiled.predict_proba, X, 5)
+    return results
+
+
+if __name__ == "__main__":
+    for name, seconds in run().items():
+        print(f"{name:<26}{seconds * 1e6:12.1f} us")
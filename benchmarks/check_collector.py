@@ -0,0 +1,57 @@
+# 收集程序端對端檢查：對本機假伺服器輪詢，確認合併請求、全域限速、每主機連線上限與訓練紀錄寫入
+# python -m benchmarks.check_collector
+import os
+import sys
+import tempfile
+import time
+
+from benchmarks.bench_tree_eval import make_burst_model
+from benchmarks.stub_server import ICONS, StubServer
+from collector import Collector, make_target
+from prob_table import build_table
+from training_log import TrainingLogWriter, read_training_log
+
+
+def run(duration=3.0, rate=20.0, burst=5, per_host=3, n_targets=12, interval=0.3, latency=0.1):
+    # 使用合成模型，確保每筆成功的查詢都會走到 predict → log
+    model = build_table(make_burst_model()[0])
+    server = StubServer(latency).start()
+    targets = [make_target({"serial": str(i), "account": f"acc{i % 3}", "table": str(100 + i), "game": "ATG-賽特"},
+                           interval, server.url) for i in range(n_targets)]
+    targets.append(make_target({"serial": "fail", "account": "acc", "table": "1"}, interval, server.url))
+    logged = []
+    with tempfile.TemporaryDirectory() as tmp:
+        log_path = os.path.join(tmp, "log")
+        with TrainingLogWriter(log_path, flush_every=16, fsync=False) as writer:
+            collector = Collector(targets, rate, burst, per_host, workers=8, writer=writer, model=model,
+                                  store_path=os.path.join(tmp, "store.npz"),
+                                  on_result=lambda t, r, e: logged.append(r is not None and r["prob"] is not None))
+            start = time.monotonic()
+            collector.run(duration)
+            collector.close()
+            elapsed = time.monotonic() - start
+        records, _ = read_training_log(log_path)
+        stored = os.path.exists(os.path.join(tmp, "store.npz"))
+    # 假伺服器每次回同一組圖示，重複輪詢不應讓同一目標的局數增加
+    rounds = [collector.store.features((t["payload"]["account"], t["payload"]["table"])) for t in targets[:-1]]
+    server.shutdown()
+    stats = collector.stats()
+    # 重試也經過 token bucket，因此直接以伺服器實際收到的請求數比對限速
+    checks = {
+        "per_host_cap": server.peak <= per_host,
+        "rate_limit": server.calls <= rate * elapsed + burst + 1,
+        "coalesced": stats["coalesced"] > 0,
+        "ok": stats["ok"] > 0 and stats["errors"] == 0,
+        "failed_target": stats["failed"] > 0,
+        "training_log": len(records) == sum(logged) == stats["ok"],
+        "feature_store": stored and all(f is not None and f["rounds"] == len(ICONS) for f in rounds),
+    }
+    return stats, {"calls": server.calls, "peak": server.peak, "elapsed": elapsed, "logged": len(records)}, checks
+
+
+if __name__ == "__main__":
+    stats, observed, checks = run()
+    print({k: round(v, 3) if isinstance(v, float) else v for k, v in {**stats, **observed}.items()})
+    for name, ok in checks.items():
+        print(f"{'✅' if ok else '❌'} {name}")
+    sys.exit(0 if all(checks.values()) else 1)
@@ -0,0 +1,107 @@
+# 離線執行全部基準測試並與 JSON 基準比較：
+#   python -m benchmarks.run_suite --save-baseline   記錄基準
+#   python -m benchmarks.run_suite                   比較並在退步超過門檻時回傳 1
+import argparse
+import json
+import os
+import platform
+import sys
+import time
+
+from benchmarks import (
+    bench_backtest,
+    bench_extract,
+    bench_scraper_parse,
+    bench_startup,
+    bench_training_log,
+    bench_tree_eval,
+)
+
+BASELINE_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "baseline.json")
+SUITES = {
+    "extract": lambda quick: bench_extract.run(sizes=(10, 1000) if quick else (10, 1000, 5000), compare=False),
+    "predict": lambda quick: {**bench_tree_eval.run(calls=100 if quick else 500), **_bench_table()},
+    "backtest": lambda quick: bench_backtest.run(n_rows=20_000 if quick else 200_000,
+                                                 rounds=(50, 10_000) if quick else (50, 100_000)),
+    "training_log": lambda quick: bench_training_log.run(n_records=10_000 if quick else 100_000),
+    "startup": lambda quick: bench_startup.run(),
+    "scraper_parse": lambda quick: bench_scraper_parse.run(sizes=(100, 1000) if quick else (100, 2000, 10000)),
+}
+
+
+def _bench_table(calls=10000):
+    import numpy as np
+
+    from prob_table import build_table
+
+    model, X = bench_tree_eval.make_burst_model()
+    start = time.perf_counter()
+    table = build_table(model)
+    results = {"prob_table_build": time.perf_counter() - start}
+    row = np.asarray(X[:1])
+    start = time.perf_counter()
+    for _ in range(calls):
+        table.predict_proba(row)
+    results["prob_table_single"] = (time.perf_counter() - start) / calls
+    return results
+
+
+def run(names=None, quick=False):
+    results = {}
+    for name in names or SUITES:
+        print(f"[{name}] ...", file=sys.stderr)
+        results.update(SUITES[name](quick))
+    return results
+
+
+def compare(results, baseline, threshold):
+    regressions = []
+    for name, seconds in sorted(results.items()):
+        base = baseline.get(name)
+        change = (seconds / base - 1) if base else None
+        flag = ""
+        if change is not None and change > threshold:
+            flag = "  ⚠️ 退步"
+            regressions.append(name)
+        change_text = f"{change:+8.1%}" if change is not None else "     新增"
+        print(f"{name:<40}{seconds * 1000:12.3f} ms  {change_text}{flag}")
+    return regressions
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="執行基準測試")
+    parser.add_argument("suites", nargs="*", help="只執行指定項目：" + ", ".join(SUITES))
+    parser.add_argument("--baseline", default=BASELINE_PATH)
+    parser.add_argument("--save-baseline", action="store_true")
+    parser.add_argument("--threshold", type=float, default=0.25, help="相對基準的容許退步比例")
+    parser.add_argument("--quick", action="store_true", help="使用較小的測試資料")
+    args = parser.parse_args(argv)
+    unknown = set(args.suites) - set(SUITES)
+    if unknown:
+        parser.error(f"未知的項目：{', '.join(sorted(unknown))}")
+
+    results = run(args.suites, args.quick)
+    baseline = {}
+    if os.path.exists(args.baseline):
+        with open(args.baseline, encoding="utf-8") as f:
+            baseline = json.load(f).get("results", {})
+    regressions = compare(results, baseline, args.threshold)
+
+    if args.save_baseline or not baseline:
+        with open(args.baseline, "w", encoding="utf-8") as f:
+            json.dump({
+                "recorded_at": time.strftime("%Y-%m-%d %H:%M:%S"),
+                "python": platform.python_version(),
+                "machine": platform.machine(),
+                "quick": args.quick,
+                "results": {**baseline, **results},
+            }, f, ensure_ascii=False, indent=2)
+        print(f"基準已寫入 {args.baseline}")
+    if regressions:
+        print(f"{len(regressions)} 項超過 {args.threshold:.0%} 門檻：{', '.join(regressions)}")
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,55 @@
+# 本機假的 verifySerial.php：回傳固定格式的爆發等級圖示，供收集程序與批次流程做端對端檢查
+# serial 為 "fail" 時回 503；同時記錄呼叫次數與最高同時連線數
+import threading
+import time
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+from urllib.parse import parse_qs
+
+ICONS = ("mega_win.png", "big_win.png", "legendary_win.png")
+
+
+class StubServer(ThreadingHTTPServer):
+    daemon_threads = True
+
+    def __init__(self, latency=0.1):
+        super().__init__(("127.0.0.1", 0), _Handler)
+        self.latency = latency
+        self.calls = 0
+        self.active = 0
+        self.peak = 0
+        self.lock = threading.Lock()
+
+    @property
+    def url(self):
+        return f"http://127.0.0.1:{self.server_address[1]}/verifySerial.php"
+
+    def start(self):
+        threading.Thread(target=self.serve_forever, daemon=True).start()
+        return self
+
+
+class _Handler(BaseHTTPRequestHandler):
+    def do_POST(self):
+        server = self.server
+        with server.lock:
+            server.calls += 1
+            server.active += 1
+            server.peak = max(server.peak, server.active)
+        try:
+            body = parse_qs(self.rfile.read(int(self.headers.get("Content-Length", 0))).decode())
+            time.sleep(server.latency)
+            if body.get("serial") == ["fail"]:
+                self.send_response(503)
+                self.end_headers()
+                return
+            html = "".join(f'<img src="/icons/{src}">' for src in ICONS)
+            self.send_response(200)
+            self.send_header("Content-Type", "text/html; charset=utf-8")
+            self.end_headers()
+            self.wfile.write(html.encode("utf-8"))
+        finally:
+            with server.lock:
+                server.active -= 1
+
+    def log_message(self, *args):
+        pass
@@ -0,0 +1,167 @@
+import argparse
+import os
+import sys
+import time
+from datetime import datetime
+
+import numpy as np
+from numpy.lib.stride_tricks import sliding_window_view
+
+from model_registry import atomic_save
+from pipeline import BURST_MODEL_PATH
+from prob_table import WINDOW
+from timing import span
+from training_log import LOG_PATH, read_training_log
+
+# 由訓練紀錄重建爆金模型：每筆紀錄（一次送出的回應）各自以 stride view 切出連續 WINDOW 局，
+# 標籤為下一局是否爆發；視窗不跨紀錄，重送或重疊的回應不會拼出不存在的序列。
+# 視窗分塊產生並以 xgb.train 續訓，記憶體只隨 chunk 大小成長
+VERSION_DIR = "models/burst"
+BURST_LEVEL = 1
+PARAMS = {
+    "objective": "binary:logistic",
+    "eval_metric": "logloss",
+    "max_depth": 4,
+    "eta": 0.1,
+    "base_score": 0.5,
+}
+
+
+def drop_resubmissions(records, tiers):
+    # 同一 (帳號, 桌號) 連續兩筆紀錄的等級完全相同時視為重送，只保留第一筆
+    last = {}
+    keep = np.ones(len(records), dtype=bool)
+    for i, (account, table, offset, length) in enumerate(zip(
+            records["account"].tolist(), records["table"].tolist(),
+            records["tier_offset"].tolist(), records["tier_len"].tolist())):
+        body = tiers[offset:offset + length].tobytes()
+        keep[i] = last.get((account, table)) != body
+        last[(account, table)] = body
+    return records[keep]
+
+
+def sequences(records, tiers, pad=True):
+    # 回傳攤平的等級序列與每個位置所屬的紀錄編號，視窗只在同一筆紀錄內滑動
+    # pad 時每筆紀錄前面補 WINDOW-1 個 0，與 FeatureStore 局數不足時左側補 0 的視窗一致
+    if not len(records):
+        return np.empty(0, dtype=np.uint8), np.empty(0, dtype=np.int64)
+    lens = records["tier_len"].astype(np.int64)
+    prefix = WINDOW - 1 if pad else 0
+    sizes = prefix + lens
+    starts = np.cumsum(sizes) - lens
+    within = np.arange(lens.sum()) - np.repeat(np.cumsum(lens) - lens, lens)
+    flat = np.zeros(int(sizes.sum()), dtype=np.uint8)
+    flat[np.repeat(starts, lens) + within] = tiers[np.repeat(records["tier_offset"], lens) + within]
+    group = np.repeat(np.arange(len(records)), sizes)
+    return flat, group
+
+
+def window_chunks(flat, group, chunk=1_000_000):
+    # 每次產生最多 chunk 個視窗 (X, y, 起點位置)；跨紀錄的視窗直接遮罩掉
+    if len(flat) <= WINDOW:
+        return
+    view = sliding_window_view(flat, WINDOW + 1)
+    for start in range(0, len(view), chunk):
+        windows = view[start:start + chunk]
+        n = len(windows)
+        valid = np.flatnonzero(group[start:start + n] == group[start + WINDOW:start + WINDOW + n])
+        windows = windows[valid]
+        yield (windows[:, :WINDOW].astype(np.float32),
+               (windows[:, WINDOW] >= BURST_LEVEL).astype(np.float32),
+               start + valid)
+
+
+def build_dataset(path=LOG_PATH, pad=True):
+    # 小型紀錄用：一次取得全部視窗
+    records, tiers = read_training_log(path)
+    flat, group = sequences(drop_resubmissions(records, tiers), tiers, pad=pad)
+    chunks = list(window_chunks(flat, group, chunk=max(len(flat), 1)))
+    if not chunks:
+        return np.empty((0, WINDOW), dtype=np.float32), np.empty(0, dtype=np.float32)
+    X, y, _ = chunks[0]
+    return X, y
+
+
+def _to_classifier(booster):
+    import xgboost as xgb
+
+    model = xgb.XGBClassifier()
+    model.load_model(bytearray(booster.save_raw("json")))
+    return model
+
+
+def retrain(path=LOG_PATH, out=BURST_MODEL_PATH, chunk=1_000_000, rounds_per_chunk=20,
+            holdout_every=10, max_holdout=200_000, params=None, pad=True):
+    import joblib
+    import xgboost as xgb
+
+    start = time.perf_counter()
+    params = {**PARAMS, **(params or {})}
+    with span("dataset"):
+        records, tiers = read_training_log(path)
+        flat, group = sequences(drop_resubmissions(records, tiers), tiers, pad=pad)
+    booster = None
+    windows = 0
+    val_X, val_y, val_n = [], [], 0
+    for X, y, idx in window_chunks(flat, group, chunk):
+        # 依視窗起點取固定比例當驗證集，不隨 chunk 大小改變
+        held = idx % holdout_every == 0 if holdout_every else np.zeros(len(idx), dtype=bool)
+        if val_n < max_holdout and held.any():
+            take = np.flatnonzero(held)[:max_holdout - val_n]
+            val_X.append(X[take])
+            val_y.append(y[take])
+            val_n += len(take)
+        train = ~held
+        if not train.any():
+            continue
+        with span("train_chunk"):
+            dtrain = xgb.DMatrix(X[train], label=y[train])
+            booster = xgb.train(params, dtrain, num_boost_round=rounds_per_chunk, xgb_model=booster)
+        windows += int(train.sum())
+    if booster is None:
+        raise ValueError("❌ 訓練紀錄不足，無法產生任何訓練視窗")
+
+    model = _to_classifier(booster)
+    version = datetime.now().strftime("%Y%m%d-%H%M%S")
+    os.makedirs(VERSION_DIR, exist_ok=True)
+    versioned = os.path.join(VERSION_DIR, f"{os.path.splitext(os.path.basename(out))[0]}-{version}.pkl")
+    joblib.dump(model, versioned)
+    atomic_save(out, lambda p: joblib.dump(model, p))
+
+    report = {"version": version, "path": versioned, "windows": windows, "holdout": val_n,
+              "logloss": float("nan"), "accuracy": float("nan"), "seconds": 0.0}
+    if val_n:
+        from sklearn.metrics import accuracy_score, log_loss
+
+        X, y = np.concatenate(val_X), np.concatenate(val_y)
+        prob = model.predict_proba(X)[:, 1]
+        report["logloss"] = float(log_loss(y, prob, labels=[0, 1]))
+        report["accuracy"] = float(accuracy_score(y, prob > 0.5))
+    report["seconds"] = time.perf_counter() - start
+    return report
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="由每日訓練紀錄重建爆金預測模型")
+    parser.add_argument("--log", default=LOG_PATH, help="訓練紀錄路徑（不含副檔名）")
+    parser.add_argument("-o", "--output", default=BURST_MODEL_PATH)
+    parser.add_argument("--chunk", type=int, default=1_000_000, help="每批視窗數")
+    parser.add_argument("--rounds-per-chunk", type=int, default=20)
+    parser.add_argument("--holdout-every", type=int, default=10, help="每 N 個視窗取一個做驗證，0 為不驗證")
+    parser.add_argument("--no-pad", action="store_true", help="只使用完整 WINDOW 局的視窗")
+    args = parser.parse_args(argv)
+
+    try:
+        report = retrain(args.log, args.output, args.chunk, args.rounds_per_chunk, args.holdout_every,
+                         pad=not args.no_pad)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(f"✅ 模型 {report['version']} 已寫入 {args.output}（版本檔 {report['path']}）")
+    print(f"訓練視窗 {report['windows']}｜驗證 {report['holdout']} 筆 logloss {report['logloss']:.4f} "
+          f"準確率 {report['accuracy']:.2%}｜耗時 {report['seconds']:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
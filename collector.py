@@ -0,0 +1,308 @@
+import argparse
+import csv
+import heapq
+import json
+import os
+import signal
+import sys
+import threading
+import time
+from collections import Counter, deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
+from urllib.parse import urlparse
+
+import numpy as np
+import requests
+
+from feature_store import FeatureStore
+from http_client import RETRY_STATUSES, VERIFY_URL, make_session
+from model_registry import atomic_save_json
+from pipeline import PAYLOAD_FIELDS, load_predictor, normalize_payload, run_submission
+from response_cache import payload_key
+from timing import span
+from training_log import LOG_PATH, TrainingLogWriter
+
+# 常駐收集程序：依排程輪詢多組 (帳號, 桌號, 遊戲)，同一目標仍在查詢中時合併請求，
+# 全域以 token bucket 限速、每個主機限制同時連線數，結果走 fetch → parse → predict → log
+# 連線層不自動重試：失敗的查詢退避後重新向 token bucket 取號，確保實際送出的請求數也受限速
+DEFAULT_INTERVAL = 60.0
+DEFAULT_RATE = 2.0
+DEFAULT_PER_HOST = 4
+DEFAULT_RETRIES = 2
+# 收集程序的特徵狀態另存一份：FeatureStore 存檔時依 key 合併，但同一 (帳號, 桌號) 兩邊同時更新仍以後存者為準。
+# 訓練紀錄可共用，TrainingLogWriter 寫入時持有跨行程檔案鎖
+COLLECTOR_STORE_PATH = "data/collector_feature_store.npz"
+
+
+class TokenBucket:
+    def __init__(self, rate, burst=None):
+        # rate <= 0 表示不限速
+        self.rate = rate
+        self.capacity = burst or max(1.0, rate)
+        self.tokens = self.capacity
+        self.updated = time.monotonic()
+        self._lock = threading.Lock()
+
+    def acquire(self):
+        # 取得一個 token，回傳等待的秒數
+        if self.rate <= 0:
+            return 0.0
+        waited = 0.0
+        while True:
+            with self._lock:
+                now = time.monotonic()
+                self.tokens = min(self.capacity, self.tokens + (now - self.updated) * self.rate)
+                self.updated = now
+                if self.tokens >= 1:
+                    self.tokens -= 1
+                    return waited
+                wait = (1 - self.tokens) / self.rate
+            time.sleep(wait)
+            waited += wait
+
+
+def make_target(row, interval=DEFAULT_INTERVAL, url=VERIFY_URL):
+    # 設定檔每列為 payload 欄位，可另外指定 interval（秒）與 url
+    return {
+        "payload": normalize_payload(row),
+        "interval": float(row.get("interval") or interval),
+        "url": row.get("url") or url,
+    }
+
+
+def load_targets(path, interval=DEFAULT_INTERVAL, url=VERIFY_URL):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        elif path.endswith(".json"):
+            config = json.load(f)
+            if isinstance(config, dict):
+                interval = float(config.get("interval", interval))
+                url = config.get("url", url)
+                config = config.get("targets", [])
+            rows = config
+        else:
+            rows = list(csv.DictReader(f))
+    return [make_target(row, interval, url) for row in rows]
+
+
+class Collector:
+    def __init__(self, targets, rate=DEFAULT_RATE, burst=None, per_host=DEFAULT_PER_HOST, workers=8,
+                 writer=None, store=None, session=None, model=None, on_result=None,
+                 store_path=COLLECTOR_STORE_PATH, retries=DEFAULT_RETRIES, backoff=0.5):
+        self.targets = {self.target_key(t): t for t in targets}
+        self.per_host = per_host
+        self.retries = retries
+        self.backoff = backoff
+        self.writer = writer
+        self.store_path = store_path
+        if store is None:
+            store = FeatureStore.load(store_path) if store_path and os.path.exists(store_path) else FeatureStore()
+        self.store = store
+        self.session = session or make_session(pool_size=workers, retries=0)
+        self.model = load_predictor() if model is None else model
+        self.on_result = on_result
+        self.counters = Counter()
+        self._bucket = TokenBucket(rate, burst)
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix="collector")
+        self._lock = threading.Lock()
+        self._inflight = {}
+        self._hosts = {}
+        self._lags = deque(maxlen=1000)
+        self._completed = deque(maxlen=10000)
+        self._stop = threading.Event()
+        self._started = time.monotonic()
+
+    @staticmethod
+    def target_key(target):
+        return target["url"], payload_key(target["payload"])
+
+    @contextmanager
+    def _host_slot(self, url):
+        host = urlparse(url).netloc
+        with self._lock:
+            slot = self._hosts.setdefault(host, threading.BoundedSemaphore(self.per_host))
+        with slot:
+            yield
+
+    def submit(self, target, due=None):
+        # 同一目標已在查詢中時不重送，直接共用進行中的 Future
+        key = self.target_key(target)
+        due = time.monotonic() if due is None else due
+        with self._lock:
+            future = self._inflight.get(key)
+            if future is not None:
+                self.counters["coalesced"] += 1
+                return future
+            future = self._pool.submit(self._collect, target, due)
+            self._inflight[key] = future
+            self.counters["polls"] += 1
+        future.add_done_callback(lambda f: self._finish(key, target, f))
+        return future
+
+    def _collect(self, target, due):
+        for attempt in range(self.retries + 1):
+            if attempt:
+                self._stop.wait(self.backoff * 2 ** (attempt - 1))
+            waited = self._bucket.acquire()
+            with self._host_slot(target["url"]):
+                with self._lock:
+                    self.counters["rate_wait_ms"] += int(waited * 1000)
+                    if attempt:
+                        self.counters["retries"] += 1
+                    else:
+                        self._lags.append(time.monotonic() - due)
+                try:
+                    with span("collector_poll"):
+                        result = run_submission(target["payload"], model=self.model, session=self.session,
+                                                url=target["url"], writer=self.writer, store=self.store,
+                                                bypass=True)
+                except requests.RequestException:
+                    if attempt == self.retries:
+                        raise
+                    continue
+            if result["status"] not in RETRY_STATUSES:
+                break
+        return result
+
+    def _finish(self, key, target, future):
+        error = future.exception()
+        result = None if error else future.result()
+        with self._lock:
+            self._inflight.pop(key, None)
+            self._completed.append(time.monotonic())
+            if error is not None:
+                self.counters["errors"] += 1
+            elif result["status"] == 200:
+                self.counters["ok"] += 1
+                self.counters["rounds"] += len(result["rounds"])
+            else:
+                self.counters["failed"] += 1
+        if self.on_result is not None:
+            self.on_result(target, result, error)
+
+    def stats(self, window=60.0):
+        now = time.monotonic()
+        with self._lock:
+            lags = np.array(self._lags) if self._lags else np.zeros(1)
+            recent = sum(t >= now - window for t in self._completed)
+            done = self.counters["ok"] + self.counters["failed"] + self.counters["errors"]
+            elapsed = now - self._started
+            return {
+                "targets": len(self.targets),
+                **{k: self.counters[k] for k in ("polls", "ok", "failed", "errors", "coalesced", "retries", "rounds")},
+                "in_flight": len(self._inflight),
+                "lag_last": float(lags[-1]),
+                "lag_p50": float(np.percentile(lags, 50)),
+                "lag_p95": float(np.percentile(lags, 95)),
+                "lag_max": float(lags.max()),
+                "rate_wait": self.counters["rate_wait_ms"] / 1000,
+                "throughput": done / elapsed if elapsed else 0.0,
+                "recent_throughput": recent / min(window, elapsed) if elapsed else 0.0,
+            }
+
+    def run(self, duration=None, once=False, report_every=None, on_report=None):
+        # 啟動時把各目標平均錯開在一個輪詢週期內，避免同時湧入
+        now = time.monotonic()
+        self._started = now
+        n = len(self.targets)
+        heap = [(now if once else now + t["interval"] * i / n, key)
+                for i, (key, t) in enumerate(self.targets.items())]
+        heapq.heapify(heap)
+        deadline = now + duration if duration else None
+        next_report = now + report_every if report_every else None
+        while not self._stop.is_set():
+            now = time.monotonic()
+            if deadline is not None and now >= deadline:
+                break
+            while heap and heap[0][0] <= now:
+                due, key = heapq.heappop(heap)
+                target = self.targets[key]
+                self.submit(target, due)
+                if not once:
+                    # 落後超過一個週期時不補跑，直接排到下一次
+                    heapq.heappush(heap, (max(due + target["interval"], now), key))
+            if next_report is not None and now >= next_report:
+                self.save_store()
+                if on_report is not None:
+                    on_report(self.stats())
+                next_report = now + report_every
+            if once and not heap:
+                with self._lock:
+                    pending = list(self._inflight.values())
+                for future in pending:
+                    future.exception()
+                break
+            waits = [1.0]
+            if heap:
+                waits.append(heap[0][0] - now)
+            if next_report is not None:
+                waits.append(next_report - now)
+            if deadline is not None:
+                waits.append(deadline - now)
+            self._stop.wait(max(min(waits), 0.0))
+        return self.stats()
+
+    def stop(self):
+        self._stop.set()
+
+    def save_store(self):
+        if self.store_path:
+            self.store.flush(self.store_path)
+
+    def close(self):
+        self._stop.set()
+        self._pool.shutdown(wait=True)
+        self.save_store()
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="多桌排程輪詢收集程序")
+    parser.add_argument("targets", help="目標清單（.json／.jsonl／.csv），欄位：" + ", ".join(PAYLOAD_FIELDS)
+                        + "，可另加 interval、url")
+    parser.add_argument("--url", default=VERIFY_URL)
+    parser.add_argument("--interval", type=float, default=DEFAULT_INTERVAL, help="預設輪詢間隔（秒）")
+    parser.add_argument("--rate", type=float, default=DEFAULT_RATE, help="全域每秒請求上限，0 為不限")
+    parser.add_argument("--burst", type=float, default=None)
+    parser.add_argument("--per-host", type=int, default=DEFAULT_PER_HOST, help="每個主機同時連線上限")
+    parser.add_argument("--retries", type=int, default=DEFAULT_RETRIES, help="失敗查詢重新排入限速的次數")
+    parser.add_argument("-w", "--workers", type=int, default=8)
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--store", default=COLLECTOR_STORE_PATH, help="收集程序專用的特徵狀態檔")
+    parser.add_argument("--report-every", type=float, default=30.0, help="每 N 秒輸出一次統計")
+    parser.add_argument("--stats-file", default=None, help="統計同時寫入 JSON 檔")
+    parser.add_argument("--duration", type=float, default=None, help="執行 N 秒後結束")
+    parser.add_argument("--once", action="store_true", help="每個目標只查詢一次")
+    args = parser.parse_args(argv)
+
+    targets = load_targets(args.targets, args.interval, args.url)
+    if not targets:
+        print("目標清單為空")
+        return 1
+
+    def report(stats):
+        print(f"[{time.strftime('%H:%M:%S')}] 查詢 {stats['polls']}（成功 {stats['ok']}／失敗 {stats['failed']}／"
+              f"錯誤 {stats['errors']}／合併 {stats['coalesced']}／重試 {stats['retries']}）｜進行中 {stats['in_flight']}｜"
+              f"延遲 p50 {stats['lag_p50']:.2f}s p95 {stats['lag_p95']:.2f}s｜"
+              f"{stats['recent_throughput']:.2f} 筆/秒", flush=True)
+        if args.stats_file:
+            atomic_save_json(args.stats_file, stats)
+
+    with TrainingLogWriter(args.log, flush_every=64) as writer:
+        collector = Collector(targets, args.rate, args.burst, args.per_host, args.workers, writer=writer,
+                              store_path=args.store, retries=args.retries)
+        signal.signal(signal.SIGTERM, lambda *_: collector.stop())
+        try:
+            collector.run(args.duration, args.once, args.report_every, report)
+        except KeyboardInterrupt:
+            pass
+        finally:
+            collector.close()
+    stats = collector.stats()
+    report(stats)
+    return 0 if stats["errors"] == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
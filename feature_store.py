@@ -0,0 +1,215 @@
+import atexit
+import json
+import os
+import threading
+
+import numpy as np
+
+from model_registry import atomic_save, file_lock
+
+# 每個 (帳號, 桌號) 保留最近 WINDOW 局的環狀緩衝區與彙總特徵，每局 O(1) 更新
+# 同一目標重送或重複輪詢時回應會重疊，extend_response 只加入上一次回應之後的新局
+# 存檔不隨每次請求進行：有變動時最多延遲 save_interval 秒，持跨行程鎖讀回檔案、依 key 合併後再寫出
+STORE_PATH = "data/feature_store.npz"
+WINDOW = 5
+N_TIERS = 6
+MEGA_LEVEL = 3
+ARRAYS = ("_ring", "_head", "_rounds", "_tier_counts", "_since_mega", "_run_length", "_last")
+
+
+class FeatureStore:
+    def __init__(self, window=WINDOW, capacity=256, path=None, save_interval=None):
+        self.size = window
+        self.path = path
+        self.save_interval = save_interval
+        self._lock = threading.Lock()
+        self._index = {}
+        self._keys = []
+        self._ring = np.zeros((capacity, window), dtype=np.int8)
+        self._head = np.zeros(capacity, dtype=np.int32)
+        self._rounds = np.zeros(capacity, dtype=np.int64)
+        self._tier_counts = np.zeros((capacity, N_TIERS), dtype=np.int32)
+        self._since_mega = np.full(capacity, -1, dtype=np.int64)
+        self._run_length = np.zeros(capacity, dtype=np.int64)
+        self._last = np.full(capacity, -1, dtype=np.int8)
+        self._responses = {}
+        self._dirty = set()
+        self._timer = None
+
+    def __len__(self):
+        return len(self._keys)
+
+    def __contains__(self, key):
+        return tuple(key) in self._index
+
+    def _grow(self):
+        capacity = len(self._head) * 2
+        for name in ARRAYS:
+            old = getattr(self, name)
+            new = np.empty((capacity,) + old.shape[1:], dtype=old.dtype)
+            new[:len(old)] = old
+            new[len(old):] = -1 if name in ("_since_mega", "_last") else 0
+            setattr(self, name, new)
+
+    def _row(self, key):
+        key = tuple(key)
+        row = self._index.get(key)
+        if row is None:
+            if len(self._keys) == len(self._head):
+                self._grow()
+            row = len(self._keys)
+            self._index[key] = row
+            self._keys.append(key)
+        return row
+
+    def _touch(self, row):
+        self._dirty.add(row)
+        if self.path and self.save_interval and self._timer is None:
+            self._timer = threading.Timer(self.save_interval, self.flush)
+            self._timer.daemon = True
+            self._timer.start()
+
+    def _update(self, row, tier):
+        self._touch(row)
+        head = self._head[row]
+        if self._rounds[row] >= self.size:
+            self._tier_counts[row, self._ring[row, head]] -= 1
+        self._ring[row, head] = tier
+        self._tier_counts[row, tier] += 1
+        self._head[row] = (head + 1) % self.size
+        self._rounds[row] += 1
+        if tier >= MEGA_LEVEL:
+            self._since_mega[row] = 0
+        elif self._since_mega[row] >= 0:
+            self._since_mega[row] += 1
+        self._run_length[row] = self._run_length[row] + 1 if self._last[row] == tier else 1
+        self._last[row] = tier
+
+    def update(self, key, tier):
+        with self._lock:
+            self._update(self._row(key), int(tier))
+
+    def extend(self, key, tiers):
+        with self._lock:
+            row = self._row(key)
+            for tier in tiers:
+                self._update(row, int(tier))
+            return self._window(row)
+
+    def extend_response(self, key, tiers):
+        # 回應為最近幾局的等級；與上一次回應尾端重疊的部分已計入，只加入未見過的後段
+        tiers = tuple(int(t) for t in tiers)
+        with self._lock:
+            row = self._row(key)
+            seen = _overlap(self._responses.get(row, ()), tiers)
+            for tier in tiers[seen:]:
+                self._update(row, tier)
+            self._responses[row] = tiers
+            return self._window(row)
+
+    def _window(self, row):
+        rounds = self._rounds[row]
+        if rounds >= self.size:
+            return np.roll(self._ring[row], -int(self._head[row]))
+        out = np.zeros(self.size, dtype=np.int8)
+        if rounds:
+            out[-rounds:] = self._ring[row, :rounds]
+        return out
+
+    def window(self, key):
+        # 與模型輸入相同：最近 WINDOW 局，不足時左側補 0
+        with self._lock:
+            row = self._index.get(tuple(key))
+            return np.zeros(self.size, dtype=np.int8) if row is None else self._window(row)
+
+    def features(self, key):
+        with self._lock:
+            row = self._index.get(tuple(key))
+            if row is None:
+                return None
+            return {
+                "window": self._window(row),
+                "tier_counts": self._tier_counts[row].copy(),
+                "rounds": int(self._rounds[row]),
+                "since_mega": int(self._since_mega[row]),
+                "run_length": int(self._run_length[row]),
+                "last": int(self._last[row]),
+            }
+
+    def _merge(self, other):
+        # 採用檔案中其他行程的狀態，只有本行程上次存檔後更新過的 key 以自己的為準
+        if other.size != self.size:
+            return
+        for key, src in other._index.items():
+            row = self._row(key)
+            if row in self._dirty:
+                continue
+            for name in ARRAYS:
+                getattr(self, name)[row] = getattr(other, name)[src]
+            if src in other._responses:
+                self._responses[row] = other._responses[src]
+
+    def save(self, path=None):
+        path = path or self.path or STORE_PATH
+        os.makedirs(os.path.dirname(path) or ".", exist_ok=True)
+        with file_lock(path):
+            disk = FeatureStore.load(path) if os.path.exists(path) else None
+            with self._lock:
+                if self._timer is not None:
+                    self._timer.cancel()
+                    self._timer = None
+                if disk is not None:
+                    self._merge(disk)
+                n = len(self._keys)
+                arrays = {name.lstrip("_"): getattr(self, name)[:n].copy() for name in ARRAYS}
+                keys = json.dumps([list(k) for k in self._keys], ensure_ascii=False)
+                responses = json.dumps([self._responses.get(row) for row in range(n)])
+                self._dirty.clear()
+            atomic_save(path, lambda p: np.savez(p, keys=np.array(keys), responses=np.array(responses),
+                                                 size=np.array(self.size), **arrays))
+
+    def flush(self, path=None):
+        # 有未存檔的更新才寫出
+        if self._dirty:
+            self.save(path)
+
+    @classmethod
+    def load(cls, path=STORE_PATH, save_interval=None):
+        with np.load(path) as data:
+            keys = [tuple(k) for k in json.loads(str(data["keys"]))]
+            store = cls(window=int(data["size"]), capacity=max(len(keys), 256), path=path,
+                        save_interval=save_interval)
+            n = len(keys)
+            for name in ARRAYS:
+                getattr(store, name)[:n] = data[name.lstrip("_")]
+            if "responses" in data:
+                store._responses = {row: tuple(r) for row, r in enumerate(json.loads(str(data["responses"])))
+                                    if r is not None}
+        store._keys = keys
+        store._index = {k: i for i, k in enumerate(keys)}
+        return store
+
+
+def _overlap(previous, tiers):
+    # 上一次回應的尾端與這次回應開頭重疊的最長長度；完全相同的重送即整段重疊
+    for k in range(min(len(previous), len(tiers)), 0, -1):
+        if previous[-k:] == tiers[:k]:
+            return k
+    return 0
+
+
+_store = None
+_store_lock = threading.Lock()
+
+
+def get_store(path=STORE_PATH, save_interval=5.0):
+    # 共用的行程內狀態；有更新時最多延遲 save_interval 秒存檔，結束時由 atexit 補存
+    global _store
+    with _store_lock:
+        if _store is None:
+            if os.path.exists(path):
+                _store = FeatureStore.load(path, save_interval=save_interval)
+            else:
+                _store = FeatureStore(path=path, save_interval=save_interval)
+            atexit.register(_store.flush)
+        return _store
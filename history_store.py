@@ -0,0 +1,129 @@
+import io
+import json
+import os
+import threading
+
+import numpy as np
+import pandas as pd
+
+import partition_store
+from model_registry import atomic_save, atomic_save_json
+
+# 每次爬取的資料合併進 data/history.csv：以欄位雜湊去重，只附加新的列
+# 編號為頁面表格第一欄的局別識別碼；同一天同樣數值的不同局靠它區分
+HISTORY_PATH = "data/history.csv"
+COLUMNS = ["日期", "局數", "爆金", "小分", "免費遊戲", "爆發指數", "編號"]
+TEXT_COLUMNS = ("日期", "編號")
+
+_lock = threading.Lock()
+
+
+def _index_paths(path):
+    root, _ = os.path.splitext(path)
+    return f"{root}.keys", f"{root}.meta.json"
+
+
+def _with_columns(df):
+    # 舊資料沒有編號欄，以空字串補上
+    if "編號" not in df.columns:
+        df = df.assign(編號="")
+    return df[COLUMNS].fillna({"編號": ""})
+
+
+def row_keys(df):
+    # 文字欄位轉字串、數值欄位一律轉成 float64 後再雜湊，避免 int/float 造成同一列雜湊不同
+    normalized = _with_columns(df).astype({c: "float64" for c in COLUMNS if c not in TEXT_COLUMNS})
+    normalized = normalized.astype({c: str for c in TEXT_COLUMNS})
+    return pd.util.hash_pandas_object(normalized, index=False).to_numpy(np.uint64)
+
+
+def _upgrade_header(path):
+    # 舊版 history.csv 沒有編號欄：一次性改寫整份檔案並重建索引
+    with open(path, "rb") as f:
+        header = f.readline().decode("utf-8-sig").strip().split(",")
+    if header == COLUMNS:
+        return
+    df = _with_columns(pd.read_csv(path, dtype={c: str for c in TEXT_COLUMNS}, keep_default_na=False))
+    atomic_save(path, lambda p: df.to_csv(p, index=False))
+    for index_path in _index_paths(path):
+        if os.path.exists(index_path):
+            os.remove(index_path)
+
+
+def _load_index(path):
+    keys_path, meta_path = _index_paths(path)
+    size = os.path.getsize(path) if os.path.exists(path) else 0
+    if os.path.exists(keys_path) and os.path.exists(meta_path):
+        with open(meta_path, encoding="utf-8") as f:
+            meta = json.load(f)
+        if meta["size"] == size:
+            return np.fromfile(keys_path, dtype=np.uint64)
+    # 索引缺失或與資料檔不一致（例如寫入途中中斷）時，從資料檔重建
+    keys = (row_keys(pd.read_csv(path, dtype={c: str for c in TEXT_COLUMNS}, keep_default_na=False))
+            if size else np.empty(0, dtype=np.uint64))
+    keys.tofile(keys_path)
+    _save_meta(path, len(keys))
+    return keys
+
+
+def _save_meta(path, rows):
+    _, meta_path = _index_paths(path)
+    atomic_save_json(meta_path, {"rows": rows, "size": os.path.getsize(path) if os.path.exists(path) else 0})
+
+
+def upsert_history(df, path=HISTORY_PATH):
+    if df.empty:
+        return 0
+    with _lock:
+        if os.path.exists(path) and os.path.getsize(path):
+            _upgrade_header(path)
+        existing = _load_index(path)
+        # 只與既有資料比對；同一次爬取內的列各自是不同局，不互相去重
+        df = _with_columns(df)
+        keys = row_keys(df)
+        fresh = ~np.isin(keys, existing)
+        if not fresh.any():
+            return 0
+        new_rows = df.loc[fresh]
+        header = not os.path.exists(path) or os.path.getsize(path) == 0
+        new_rows.to_csv(path, mode="a", header=header, index=False)
+        keys_path, _ = _index_paths(path)
+        with open(keys_path, "ab") as f:
+            f.write(keys[fresh].tobytes())
+        _save_meta(path, len(existing) + int(fresh.sum()))
+        if path == HISTORY_PATH and partition_store.exists():
+            partition_store.append_rows(new_rows)
+        return int(fresh.sum())
+
+
+def read_since(offset=0, chunksize=None, path=HISTORY_PATH):
+    # 只讀取 offset（位元組）之後完整寫入的列；回傳 (欄位, DataFrame 或分批迭代器, 新 offset)
+    with open(path, "rb") as f:
+        header = f.readline()
+        f.seek(max(offset, len(header)))
+        data = f.read()
+    data = data[:data.rfind(b"\n") + 1]
+    columns = header.decode("utf-8-sig").strip().split(",")
+    if data.strip():
+        rows = pd.read_csv(io.BytesIO(data), header=None, names=columns, chunksize=chunksize)
+    else:
+        rows = pd.DataFrame(columns=columns) if chunksize is None else []
+    return columns, rows, max(offset, len(header)) + len(data)
+
+
+def migrate_legacy(legacy_paths=("data/haoting_data.csv",), path=HISTORY_PATH):
+    # 一次性轉換：舊 CSV 先去重併入 history.csv，再整份轉成日期分區
+    for legacy in legacy_paths:
+        if os.path.exists(legacy) and os.path.getsize(legacy):
+            upsert_history(pd.read_csv(legacy, dtype={"日期": str}), path)
+    return partition_store.migrate_from_csv([path])
+
+
+def load_tail(n, path=HISTORY_PATH):
+    if path == HISTORY_PATH and partition_store.exists():
+        return partition_store.read_tail(n)
+    return pd.read_csv(path).tail(n)
+
+
+if __name__ == "__main__":
+    print(f"已轉換 {migrate_legacy()} 列至 {partition_store.PARTS_ROOT}")
@@ -0,0 +1,53 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor, as_completed
+
+import requests
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+VERIFY_URL = "https://haoting.info/verifySerial.php"
+DEFAULT_TIMEOUT = (5, 30)
+RETRY_STATUSES = (429, 500, 502, 503, 504)
+
+_session = None
+_session_lock = threading.Lock()
+
+
+def make_session(pool_size=16, retries=3, backoff=0.5):
+    session = requests.Session()
+    # verifySerial.php 為查詢性質，POST 也允許重試；最後一次仍失敗時回傳原始狀態碼
+    retry = Retry(
+        total=retries,
+        backoff_factor=backoff,
+        status_forcelist=RETRY_STATUSES,
+        allowed_methods=None,
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(pool_connections=pool_size, pool_maxsize=pool_size, max_retries=retry)
+    session.mount("https://", adapter)
+    session.mount("http://", adapter)
+    return session
+
+
+def get_session():
+    global _session
+    with _session_lock:
+        if _session is None:
+            _session = make_session()
+        return _session
+
+
+def submit_serial(payload, session=None, url=VERIFY_URL, timeout=DEFAULT_TIMEOUT):
+    return (session or get_session()).post(url, data=payload, timeout=timeout)
+
+
+def submit_serials(payloads, max_workers=8, session=None, url=VERIFY_URL, timeout=DEFAULT_TIMEOUT):
+    # 同時最多 max_workers 個請求，依完成順序逐筆回傳 (payload, response, error)
+    session = session or make_session(pool_size=max_workers)
+    with ThreadPoolExecutor(max_workers=max_workers) as pool:
+        futures = {pool.submit(submit_serial, p, session, url, timeout): p for p in payloads}
+        for future in as_completed(futures):
+            try:
+                yield futures[future], future.result(), None
+            except Exception as e:
+                yield futures[future], None, e
@@ -0,0 +1,99 @@
+import threading
+import time
+import uuid
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+
+import timing
+from pipeline import run_submission
+
+# 背景執行序號分析：每個工作有 job ID，各階段完成時更新結果供介面輪詢
+
+
+class Job:
+    def __init__(self, payload):
+        self.id = uuid.uuid4().hex[:8]
+        self.payload = payload
+        self.status = "queued"
+        self.stages = []
+        self.result = None
+        self.error = None
+        self.profile = None
+        self.created = time.time()
+        self.started = None
+        self.finished = None
+
+    def snapshot(self):
+        return {
+            "id": self.id,
+            "payload": self.payload,
+            "status": self.status,
+            "stages": list(self.stages),
+            "result": self.result,
+            "error": self.error,
+            "profile": self.profile,
+            "created": self.created,
+            "elapsed": (self.finished or time.time()) - (self.started or self.created),
+        }
+
+
+class JobManager:
+    def __init__(self, max_workers=4, history=100):
+        self.history = history
+        self._pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="seth-job")
+        self._jobs = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, payload, profile=False, **kwargs):
+        job = Job(payload)
+        with self._lock:
+            self._jobs[job.id] = job
+            while len(self._jobs) > self.history:
+                oldest = next(iter(self._jobs.values()))
+                if oldest.status in ("queued", "running"):
+                    break
+                self._jobs.popitem(last=False)
+        self._pool.submit(self._run, job, profile, kwargs)
+        return job.id
+
+    def _run(self, job, profile, kwargs):
+        def on_stage(stage, result):
+            with self._lock:
+                job.result = dict(result)
+                job.stages.append(stage)
+
+        with self._lock:
+            job.status = "running"
+            job.started = time.time()
+        try:
+            if profile:
+                with timing.profile_request() as report:
+                    result = run_submission(job.payload, on_stage=on_stage, **kwargs)
+                job.profile = report["text"]
+            else:
+                result = run_submission(job.payload, on_stage=on_stage, **kwargs)
+            with self._lock:
+                job.result = dict(result)
+                job.status = "done"
+        except Exception as e:
+            with self._lock:
+                job.error = str(e)
+                job.status = "error"
+        finally:
+            job.finished = time.time()
+
+    def get(self, job_id):
+        with self._lock:
+            job = self._jobs.get(job_id)
+            return job.snapshot() if job else None
+
+    def jobs(self, ids=None):
+        with self._lock:
+            selected = [self._jobs[i] for i in ids if i in self._jobs] if ids is not None else reversed(self._jobs.values())
+            return [job.snapshot() for job in selected]
+
+    def in_flight(self, ids=None):
+        return sum(job["status"] in ("queued", "running") for job in self.jobs(ids))
+
+    def shutdown(self):
+        self._pool.shutdown(wait=False, cancel_futures=True)
@@ -0,0 +1,116 @@
+import json
+import os
+import tempfile
+import threading
+import time
+from contextlib import contextmanager
+
+try:
+    import fcntl
+except ImportError:  # Windows 無 flock，只保證同一行程內的安全
+    fcntl = None
+
+# 每個行程只載入一次模型；以路徑 + (mtime, size) 判斷檔案是否已更新
+_lock = threading.Lock()
+_models = {}
+_stats = {}
+
+
+def _file_key(path):
+    st = os.stat(path)
+    return st.st_mtime_ns, st.st_size
+
+
+def _stat_entry(name):
+    return _stats.setdefault(name, {"loads": 0, "hits": 0, "load_seconds": 0.0, "last_load_seconds": 0.0})
+
+
+def get_model(path, loader, kind=None):
+    # kind 用來區分同一個檔案的不同載入結果（例如原始模型與編譯後的樹陣列）
+    path = os.path.abspath(path)
+    name = path if kind is None else f"{path}#{kind}"
+    key = _file_key(path)
+    entry = _models.get(name)
+    if entry is None or entry[0] != key:
+        with _lock:
+            entry = _models.get(name)
+            if entry is None or entry[0] != _file_key(path):
+                entry = _load(path, name, loader)
+    else:
+        _stat_entry(name)["hits"] += 1
+    if isinstance(entry[1], Exception):
+        # 同一版本的檔案載入失敗時不重複反序列化
+        raise entry[1]
+    return entry[1]
+
+
+def _load(path, name, loader):
+    for _ in range(3):
+        key = _file_key(path)
+        start = time.perf_counter()
+        try:
+            model = loader(path)
+        except Exception as e:
+            model = e
+        elapsed = time.perf_counter() - start
+        # 載入期間檔案被替換時重新載入，避免快取到舊版本
+        if _file_key(path) == key:
+            break
+    stats = _stat_entry(name)
+    stats["loads"] += 1
+    stats["load_seconds"] += elapsed
+    stats["last_load_seconds"] = elapsed
+    _models[name] = (key, model)
+    return _models[name]
+
+
+def invalidate(path=None):
+    with _lock:
+        if path is None:
+            _models.clear()
+        else:
+            path = os.path.abspath(path)
+            for name in [n for n in _models if n == path or n.startswith(path + "#")]:
+                del _models[name]
+
+
+def model_stats():
+    return {name: dict(stats) for name, stats in _stats.items()}
+
+
+@contextmanager
+def file_lock(path):
+    # 跨行程互斥：多個行程（Streamlit、批次 CLI、收集程序）共用同一份檔案時，寫入前需持有此鎖
+    with open(f"{path}.lock", "a") as f:
+        if fcntl is not None:
+            fcntl.flock(f.fileno(), fcntl.LOCK_EX)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(f.fileno(), fcntl.LOCK_UN)
+
+
+def atomic_save(path, save):
+    # 先寫入同目錄暫存檔再 os.replace，讀取端永遠不會看到寫到一半的檔案
+    # 暫存檔名唯一（保留副檔名供 save 判斷格式），多個執行緒或行程同時存檔不會互相踩到
+    directory, name = os.path.split(path)
+    root, ext = os.path.splitext(name)
+    fd, tmp_path = tempfile.mkstemp(dir=directory or ".", prefix=f"{root}.", suffix=f".tmp{ext}")
+    os.close(fd)
+    try:
+        save(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+    invalidate(path)
+
+
+def atomic_save_json(path, data):
+    def save(tmp_path):
+        with open(tmp_path, "w", encoding="utf-8") as f:
+            json.dump(data, f, ensure_ascii=False)
+
+    atomic_save(path, save)
@@ -0,0 +1,67 @@
+import os
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+
+from analyzer import DATA_PATH, FEATURES, load_jackpot_model, round_pnl
+
+# 以區塊重抽樣（block bootstrap）產生大量資金路徑，一次以 2-D 陣列計算下注結果
+
+
+def resample_indices(rng, n, n_paths, rounds, block=1):
+    n_blocks = -(-rounds // block)
+    starts = rng.integers(0, n, (n_paths, n_blocks))
+    idx = (starts[:, :, None] + np.arange(block)) % n
+    return idx.reshape(n_paths, -1)[:, :rounds]
+
+
+def _simulate_shard(pnl, n_paths, rounds, capital, block, seed):
+    rng = np.random.default_rng(seed)
+    balance = capital + np.cumsum(pnl[resample_indices(rng, len(pnl), n_paths, rounds, block)], axis=1)
+    # 資金歸零即視為破產，之後資金維持在破產當局的數值
+    broke = balance <= 0
+    ruined = broke.any(axis=1)
+    first = broke.argmax(axis=1)
+    after = ruined[:, None] & (np.arange(rounds) > first[:, None])
+    balance = np.where(after, balance[np.arange(n_paths), first][:, None], balance)
+    peak = np.maximum(np.maximum.accumulate(balance, axis=1), capital)
+    return balance[:, -1], (peak - balance).max(axis=1), ruined
+
+
+def simulate_paths(pnl, n_paths=10000, rounds=50, capital=1000, block=1, seed=None, shards=1):
+    # 同一組 (seed, shards) 可重現相同結果
+    seeds = np.random.SeedSequence(seed).spawn(shards)
+    sizes = [n_paths // shards + (i < n_paths % shards) for i in range(shards)]
+    args = [(pnl, size, rounds, capital, block, s) for size, s in zip(sizes, seeds)]
+    if shards == 1:
+        parts = [_simulate_shard(*args[0])]
+    else:
+        with ProcessPoolExecutor(max_workers=min(shards, os.cpu_count())) as pool:
+            parts = list(pool.map(_simulate_shard, *zip(*args)))
+    return tuple(np.concatenate(p) for p in zip(*parts))
+
+
+def summarize(final, drawdown, ruined, capital):
+    q = np.percentile(final, [5, 25, 50, 75, 95])
+    return {
+        "paths": len(final),
+        "mean_final": float(final.mean()),
+        "std_final": float(final.std()),
+        "p5": float(q[0]), "p25": float(q[1]), "median": float(q[2]), "p75": float(q[3]), "p95": float(q[4]),
+        "profit_probability": float((final > capital).mean()),
+        "ruin_probability": float(ruined.mean()),
+        "mean_drawdown": float(drawdown.mean()),
+        "max_drawdown": float(drawdown.max()),
+    }
+
+
+def monte_carlo_ai_play(capital=1000, rounds=50, bet_unit=10, n_paths=10000, threshold=0.7, payout=4,
+                        block=1, seed=None, shards=1, history=None):
+    df = pd.read_csv(DATA_PATH) if history is None else history
+    if df.empty:
+        raise ValueError("❌ 無可用資料進行模擬")
+    probs = load_jackpot_model().predict_proba(df[FEATURES])[:, 1]
+    _, _, pnl = round_pnl(probs, df['爆金'].to_numpy(), bet_unit, threshold, payout)
+    final, drawdown, ruined = simulate_paths(pnl, n_paths, rounds, capital, block, seed, shards)
+    return summarize(final, drawdown, ruined, capital)
@@ -0,0 +1,135 @@
+import json
+import os
+import shutil
+import threading
+
+import numpy as np
+import pandas as pd
+
+from model_registry import atomic_save_json
+
+# 依日期分區、每欄一個 .npy 檔的歷史資料；讀取時以 memory map 開啟，只碰需要的分區
+PARTS_ROOT = "data/history_parts"
+MANIFEST = "manifest.json"
+DTYPES = {
+    "局數": np.int32,
+    "爆金": np.int8,
+    "小分": np.int8,
+    "免費遊戲": np.int8,
+    "爆發指數": np.float32,
+}
+COLUMNS = ["日期"] + list(DTYPES)
+
+_lock = threading.Lock()
+
+
+def exists(root=PARTS_ROOT):
+    return os.path.exists(os.path.join(root, MANIFEST))
+
+
+def _load_manifest(root):
+    path = os.path.join(root, MANIFEST)
+    if not os.path.exists(path):
+        return {}
+    with open(path, encoding="utf-8") as f:
+        return json.load(f)
+
+
+def _save_manifest(root, manifest):
+    atomic_save_json(os.path.join(root, MANIFEST), dict(sorted(manifest.items())))
+
+
+def partitions(root=PARTS_ROOT):
+    # 分區清單與列數記錄在 manifest 中，查詢時不必逐一開檔
+    return list(_load_manifest(root).items())
+
+
+def _read_partition(root, date, mmap=True):
+    part = os.path.join(root, date)
+    return {col: np.load(os.path.join(part, f"{col}.npy"), mmap_mode="r" if mmap else None) for col in DTYPES}
+
+
+def _write_partition(root, date, columns):
+    # 先寫入暫存目錄再換名，讀取端不會看到只寫了一半欄位的分區
+    part = os.path.join(root, date)
+    tmp, old = f"{part}.tmp", f"{part}.old"
+    shutil.rmtree(tmp, ignore_errors=True)
+    os.makedirs(tmp)
+    for col, dtype in DTYPES.items():
+        np.save(os.path.join(tmp, f"{col}.npy"), np.asarray(columns[col], dtype=dtype))
+    if os.path.exists(part):
+        os.replace(part, old)
+    os.replace(tmp, part)
+    shutil.rmtree(old, ignore_errors=True)
+
+
+def append_rows(df, root=PARTS_ROOT):
+    if df.empty:
+        return 0
+    with _lock:
+        os.makedirs(root, exist_ok=True)
+        manifest = _load_manifest(root)
+        for date, group in df.groupby(df["日期"].astype(str), sort=True):
+            columns = {col: group[col].to_numpy() for col in DTYPES}
+            if date in manifest:
+                existing = _read_partition(root, date, mmap=False)
+                columns = {col: np.concatenate([existing[col], columns[col].astype(DTYPES[col])]) for col in DTYPES}
+            _write_partition(root, date, columns)
+            manifest[date] = len(columns["局數"])
+        _save_manifest(root, manifest)
+    return len(df)
+
+
+def _frame(root, dates, start_row=0):
+    frames = []
+    for date in dates:
+        cols = _read_partition(root, date)
+        n = len(cols["局數"])
+        frames.append(pd.DataFrame({"日期": np.full(n, date, dtype=object), **{c: np.asarray(v) for c, v in cols.items()}}))
+    df = pd.concat(frames, ignore_index=True) if frames else pd.DataFrame(columns=COLUMNS)
+    df.index = pd.RangeIndex(start_row, start_row + len(df))
+    return df
+
+
+def read_tail(n, root=PARTS_ROOT):
+    # 從最新的分區往回讀，湊滿 n 列即停止；索引為全體資料中的列號
+    parts = partitions(root)
+    total = sum(count for _, count in parts)
+    needed, first = 0, len(parts)
+    while first > 0 and needed < n:
+        first -= 1
+        needed += parts[first][1]
+    df = _frame(root, [date for date, _ in parts[first:]], total - needed)
+    return df.iloc[max(len(df) - n, 0):]
+
+
+def read_range(start=None, end=None, root=PARTS_ROOT):
+    parts = partitions(root)
+    selected = [i for i, (d, _) in enumerate(parts) if (start is None or d >= start) and (end is None or d <= end)]
+    if not selected:
+        return pd.DataFrame(columns=COLUMNS)
+    start_row = sum(count for _, count in parts[:selected[0]])
+    return _frame(root, [parts[i][0] for i in selected], start_row)
+
+
+def migrate_from_csv(paths, root=PARTS_ROOT, chunksize=1_000_000):
+    # 一次性轉換：分批讀取 CSV、依日期累積後每個分區只寫入一次
+    if os.path.isdir(root):
+        shutil.rmtree(root)
+    buckets = {}
+    rows = 0
+    for path in paths:
+        if not os.path.exists(path):
+            continue
+        for chunk in pd.read_csv(path, chunksize=chunksize, dtype={"日期": str}):
+            for date, group in chunk.groupby("日期", sort=False):
+                buckets.setdefault(date, []).append(group[list(DTYPES)])
+            rows += len(chunk)
+    os.makedirs(root, exist_ok=True)
+    manifest = {}
+    for date, groups in buckets.items():
+        merged = pd.concat(groups)
+        _write_partition(root, date, {col: merged[col].to_numpy() for col in DTYPES})
+        manifest[date] = len(merged)
+    _save_manifest(root, manifest)
+    return rows
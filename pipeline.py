@@ -0,0 +1,207 @@
+import argparse
+import csv
+import json
+import sys
+import time
+from concurrent.futures import ThreadPoolExecutor, as_completed
+from datetime import datetime
+
+from feature_store import get_store
+from http_client import VERIFY_URL, make_session, submit_serial
+from model_registry import get_model
+from predict_server import get_client
+from prob_table import build_table
+from replay_utils import LEVEL_MAP, analyze_replay_urls
+from response_cache import get_cache
+from timing import span
+from training_log import LOG_PATH, TrainingLogWriter, get_writer
+from verify_parser import extract_verify_response
+
+# 送出序號 → 擷取爆發等級 → AI 預測 → 寫入訓練紀錄；Streamlit 與批次 CLI 共用
+BURST_MODEL_PATH = "xgb_burst_predictor.pkl"
+BET_THRESHOLD = 0.6
+PAYLOAD_FIELDS = ("serial", "device", "account", "amount", "game", "table")
+
+
+def _load_pickle(path):
+    import joblib
+
+    return joblib.load(path)
+
+
+def _load_table(path):
+    return build_table(_load_pickle(path))
+
+
+def load_model():
+    # 模型檔案更新時 registry 會重新建立整張機率表
+    try:
+        return get_model(BURST_MODEL_PATH, _load_table, kind="table")
+    except:
+        return None
+
+
+def load_predictor():
+    # 設定 SETH_PREDICT_ADDR 時改由本機預測服務評分（服務不可用時自動退回本行程）
+    client = get_client()
+    if client is None:
+        return load_model()
+    return client.model("burst")
+
+
+def make_betting_decision(prob, threshold=BET_THRESHOLD):
+    if prob >= threshold:
+        return f"✅ 建議下注（信心值 {prob*100:.1f}%）"
+    else:
+        return f"⛔ 建議觀望（信心值 {prob*100:.1f}%）"
+
+
+def normalize_payload(payload):
+    return {field: str(payload.get(field, "")).strip() for field in PAYLOAD_FIELDS}
+
+
+STAGES = ("rounds", "prediction", "replays")
+
+
+def run_submission(payload, model=None, session=None, url=VERIFY_URL, writer=None, store=None,
+                   cache=None, refresh=False, bypass=False, on_stage=None):
+    # refresh：忽略快取重新查詢並更新快取；bypass：完全不讀寫快取
+    # on_stage(stage, result)：每完成一個階段（STAGES）就回呼一次，供介面逐步顯示
+    on_stage = on_stage or (lambda stage, result: None)
+    cache = get_cache() if cache is None else cache
+    with span("submission"):
+        if bypass or refresh:
+            cache.count("bypass" if bypass else "refresh")
+        else:
+            cached = cache.get(payload)
+            if cached is not None:
+                for stage in STAGES:
+                    on_stage(stage, cached)
+                return cached
+        result = _run_submission(payload, model, session, url, writer, store, on_stage)
+        if not bypass and result["status"] == 200:
+            cache.put(payload, result)
+        return result
+
+
+def _run_submission(payload, model, session, url, writer, store, on_stage):
+    model = load_predictor() if model is None else model
+    store = get_store() if store is None else store
+    result = {"payload": payload, "status": None, "rounds": [], "prob": None, "decision": None, "replays": []}
+    with span("fetch"):
+        res = submit_serial(payload, session=session, url=url)
+    result["status"] = res.status_code
+    if res.status_code != 200:
+        return result
+
+    with span("parse"):
+        icons, replay_urls = extract_verify_response(res.text)
+    now = datetime.now().strftime("%Y-%m-%d %H:%M:%S")
+    result["rounds"] = [
+        {"時間": now, "爆發等級": win_type, "圖片": src, "數值": LEVEL_MAP.get(win_type, 0)}
+        for src, win_type in icons
+    ]
+    on_stage("rounds", result)
+    values = [r["數值"] for r in result["rounds"]]
+    key = (payload["account"], payload.get("table", ""))
+    if values:
+        with span("features"):
+            window = store.extend_response(key, values)
+    if values and model is not None:
+        with span("predict"):
+            prob = float(model.predict_proba(window.reshape(1, -1))[0][1])
+        result["prob"] = prob
+        result["decision"] = make_betting_decision(prob)
+        with span("log"):
+            (writer or get_writer()).append(
+                payload["serial"], payload["account"], values, prob, prob >= BET_THRESHOLD,
+                table=payload.get("table", ""),
+            )
+    on_stage("prediction", result)
+    with span("replay"):
+        result["replays"] = list(zip(replay_urls, analyze_replay_urls(replay_urls)))
+    on_stage("replays", result)
+    return result
+
+
+def run_batch(payloads, max_workers=8, url=VERIFY_URL, writer=None, refresh=False):
+    # 依完成順序回傳 (payload, result, error)；模型與連線池在整批中共用
+    model = load_predictor()
+    session = make_session(pool_size=max_workers)
+    store = get_store()
+    try:
+        with ThreadPoolExecutor(max_workers=max_workers) as pool:
+            futures = {pool.submit(run_submission, p, model, session, url, writer, store, refresh=refresh): p
+                       for p in payloads}
+            for future in as_completed(futures):
+                try:
+                    yield futures[future], future.result(), None
+                except Exception as e:
+                    yield futures[future], None, e
+    finally:
+        store.flush()
+
+
+def read_payloads(path):
+    with open(path, encoding="utf-8") as f:
+        if path.endswith(".jsonl"):
+            rows = [json.loads(line) for line in f if line.strip()]
+        else:
+            rows = list(csv.DictReader(f))
+    return [normalize_payload(row) for row in rows]
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="批次送出序號並產生 AI 預測")
+    parser.add_argument("input", nargs="?", help="序號清單（.csv 或 .jsonl），欄位：" + ", ".join(PAYLOAD_FIELDS))
+    parser.add_argument("-o", "--output", default="predictions.jsonl")
+    parser.add_argument("-w", "--workers", type=int, default=8)
+    parser.add_argument("--url", default=VERIFY_URL)
+    parser.add_argument("--log", default=LOG_PATH)
+    parser.add_argument("--refresh", action="store_true", help="忽略快取，全部重新查詢")
+    parser.add_argument("--verify-table", type=int, default=0, metavar="N", help="抽樣 N 筆比對機率表與即時模型")
+    args = parser.parse_args(argv)
+
+    if args.verify_table:
+        model = load_model()
+        if model is None:
+            print("尚未載入 AI 模型")
+            return 1
+        error = model.verify(args.verify_table)
+        print(f"機率表抽樣 {args.verify_table} 筆，最大誤差 {error:.2e}")
+        return 0 if error < 1e-5 else 1
+    if not args.input:
+        parser.error("請指定序號清單檔案")
+
+    payloads = read_payloads(args.input)
+    ok = failed = 0
+    start = time.perf_counter()
+    with TrainingLogWriter(args.log, flush_every=256) as writer, open(args.output, "w", encoding="utf-8") as out:
+        lines = []
+        for payload, result, error in run_batch(payloads, args.workers, args.url, writer, args.refresh):
+            if error is None and result["status"] == 200:
+                ok += 1
+            else:
+                failed += 1
+            lines.append(json.dumps({
+                "payload": payload,
+                "status": result["status"] if result else None,
+                "values": [r["數值"] for r in result["rounds"]] if result else [],
+                "prob": result["prob"] if result else None,
+                "replays": result["replays"] if result else [],
+                "error": str(error) if error else None,
+            }, ensure_ascii=False))
+            if len(lines) >= 256:
+                out.write("\n".join(lines) + "\n")
+                lines.clear()
+        if lines:
+            out.write("\n".join(lines) + "\n")
+    elapsed = time.perf_counter() - start
+    rate = len(payloads) / elapsed if elapsed else 0.0
+    print(f"完成 {len(payloads)} 筆（成功 {ok}／失敗 {failed}），耗時 {elapsed:.2f}s，{rate:.1f} 筆/秒")
+    print(f"快取命中率 {get_cache().stats()['hit_rate']:.1%}")
+    return 0 if failed == 0 else 1
+
+
+if __name__ == "__main__":
+    sys.exit(main())
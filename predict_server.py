@@ -0,0 +1,274 @@
+import argparse
+import json
+import os
+import queue
+import socket
+import socketserver
+import sys
+import threading
+import time
+from concurrent.futures import Future
+
+import numpy as np
+
+# 本機預測服務：每個模型只在服務行程載入一次，並把同時到達的單筆請求合併成小批次再呼叫模型
+# 協定為一行一個 JSON：{"model": "burst", "rows": [[...], ...]} → {"probs": [...]} 或 {"error": "..."}
+PREDICT_ADDR = os.environ.get("SETH_PREDICT_ADDR", "")
+DEFAULT_ADDR = "127.0.0.1:8766"
+MAX_BATCH = 64
+MAX_WAIT = 0.002
+
+
+def _score_burst(X):
+    from pipeline import load_model
+
+    model = load_model()
+    if model is None:
+        raise RuntimeError("尚未載入 AI 模型")
+    return model.predict_proba(X)[:, 1]
+
+
+def _score_jackpot(X):
+    from analyzer import load_compiled_jackpot_model
+
+    return load_compiled_jackpot_model().predict_proba(X)[:, 1]
+
+
+# 模型每次都經由 registry 取得，檔案更新後服務會自動改用新模型
+SCORERS = {"burst": _score_burst, "jackpot": _score_jackpot}
+
+
+def score_local(name, rows, scorers=None):
+    return np.asarray((scorers or SCORERS)[name](np.asarray(rows, dtype=np.float64)), dtype=np.float64)
+
+
+def parse_address(addr):
+    # "host:port" 為 TCP，其餘視為 Unix socket 路徑（可加 unix: 前綴）
+    addr = addr or DEFAULT_ADDR
+    if addr.startswith("unix:"):
+        return socket.AF_UNIX, addr[5:]
+    host, sep, port = addr.rpartition(":")
+    if sep and port.isdigit() and "/" not in addr:
+        return socket.AF_INET, (host or "127.0.0.1", int(port))
+    return socket.AF_UNIX, addr
+
+
+class MicroBatcher:
+    def __init__(self, score, max_batch=MAX_BATCH, max_wait=MAX_WAIT):
+        self.score = score
+        self.max_batch = max_batch
+        self.max_wait = max_wait
+        self.batches = 0
+        self.rows = 0
+        self._queue = queue.Queue()
+        self._thread = threading.Thread(target=self._loop, name="micro-batch", daemon=True)
+        self._thread.start()
+
+    def submit(self, rows):
+        future = Future()
+        self._queue.put((rows, future))
+        return future
+
+    def _loop(self):
+        while True:
+            items = [self._queue.get()]
+            size = len(items[0][0])
+            deadline = time.perf_counter() + self.max_wait
+            while size < self.max_batch:
+                timeout = deadline - time.perf_counter()
+                if timeout <= 0:
+                    break
+                try:
+                    item = self._queue.get(timeout=timeout)
+                except queue.Empty:
+                    break
+                items.append(item)
+                size += len(item[0])
+            self._run(items)
+
+    def _run(self, items):
+        # 每個請求在 _Handler 已檢查過形狀，這裡可以直接串接
+        try:
+            rows = np.concatenate([rows for rows, _ in items])
+            probs = np.asarray(self.score(rows), dtype=np.float64)
+        except Exception as e:
+            for _, future in items:
+                future.set_exception(e)
+            return
+        self.batches += 1
+        self.rows += len(probs)
+        start = 0
+        for rows, future in items:
+            future.set_result(probs[start:start + len(rows)].tolist())
+            start += len(rows)
+
+
+def _check_rows(rows, width):
+    # 形狀不符的請求只拒絕自己，不能混進批次拖垮同批的其他請求
+    X = np.asarray(rows, dtype=np.float64)
+    if X.ndim != 2 or not len(X) or (width is not None and X.shape[1] != width):
+        raise ValueError(f"rows 形狀錯誤：{X.shape}，應為 (n, {width})")
+    return X
+
+
+class _Handler(socketserver.StreamRequestHandler):
+    def handle(self):
+        for line in self.rfile:
+            try:
+                request = json.loads(line)
+                name = request["model"]
+                batcher = self.server.batchers[name]
+                rows = _check_rows(request["rows"], self.server.widths.get(name))
+                response = {"probs": batcher.submit(rows).result()}
+            except KeyError as e:
+                response = {"error": f"未知的欄位或模型：{e}"}
+            except Exception as e:
+                response = {"error": str(e)}
+            self.wfile.write(json.dumps(response).encode() + b"\n")
+            self.wfile.flush()
+
+
+class _TCPServer(socketserver.ThreadingTCPServer):
+    daemon_threads = True
+    allow_reuse_address = True
+
+
+class _UnixServer(socketserver.ThreadingUnixStreamServer):
+    daemon_threads = True
+
+
+def model_widths():
+    from analyzer import FEATURES
+    from prob_table import WINDOW
+
+    return {"burst": WINDOW, "jackpot": len(FEATURES)}
+
+
+def make_server(addr=DEFAULT_ADDR, max_batch=MAX_BATCH, max_wait=MAX_WAIT, scorers=None, widths=None):
+    family, address = parse_address(addr)
+    if family == socket.AF_UNIX:
+        if os.path.exists(address):
+            os.remove(address)
+        server = _UnixServer(address, _Handler)
+    else:
+        server = _TCPServer(address, _Handler)
+    server.batchers = {name: MicroBatcher(score, max_batch, max_wait)
+                       for name, score in (scorers or SCORERS).items()}
+    server.widths = model_widths() if widths is None else widths
+    return server
+
+
+class ServerError(RuntimeError):
+    pass
+
+
+class PredictClient:
+    # 每個執行緒各自維持一條連線；服務不可用時改在本行程評分，retry_after 秒後再嘗試連線
+    def __init__(self, addr=PREDICT_ADDR or DEFAULT_ADDR, timeout=2.0, retry_after=5.0, scorers=None):
+        self.family, self.address = parse_address(addr)
+        self.scorers = scorers
+        self.timeout = timeout
+        self.retry_after = retry_after
+        self.remote = 0
+        self.fallback = 0
+        self._down_until = 0.0
+        self._local = threading.local()
+
+    def _connect(self):
+        sock = socket.socket(self.family, socket.SOCK_STREAM)
+        sock.settimeout(self.timeout)
+        sock.connect(self.address)
+        if self.family == socket.AF_INET:
+            sock.setsockopt(socket.IPPROTO_TCP, socket.TCP_NODELAY, 1)
+        self._local.sock = sock
+        self._local.file = sock.makefile("rb")
+        return sock
+
+    def _close(self):
+        sock = getattr(self._local, "sock", None)
+        if sock is not None:
+            sock.close()
+        self._local.sock = self._local.file = None
+
+    def _request(self, name, rows):
+        sock = getattr(self._local, "sock", None) or self._connect()
+        sock.sendall(json.dumps({"model": name, "rows": rows}).encode() + b"\n")
+        line = self._local.file.readline()
+        if not line:
+            raise ConnectionError("預測服務已關閉連線")
+        response = json.loads(line)
+        if "error" in response:
+            raise ServerError(response["error"])
+        return np.asarray(response["probs"], dtype=np.float64)
+
+    def predict(self, name, rows):
+        rows = np.asarray(rows, dtype=np.float64).reshape(len(rows), -1).tolist()
+        if time.monotonic() >= self._down_until:
+            try:
+                probs = self._request(name, rows)
+                self.remote += 1
+                return probs
+            except ServerError:
+                # 服務可連線但無法評分（例如模型尚未載入）：這一筆改在本行程評分
+                pass
+            except (OSError, ValueError):
+                self._close()
+                self._down_until = time.monotonic() + self.retry_after
+        self.fallback += 1
+        return score_local(name, rows, self.scorers)
+
+    def model(self, name):
+        return RemoteModel(self, name)
+
+
+class RemoteModel:
+    # 提供與本機模型相同的 predict_proba 介面
+    def __init__(self, client, name):
+        self.client = client
+        self.name = name
+
+    def predict_proba(self, X):
+        p = self.client.predict(self.name, np.asarray(X))
+        return np.column_stack([1.0 - p, p])
+
+
+_client = None
+_client_lock = threading.Lock()
+
+
+def get_client():
+    # 只有設定 SETH_PREDICT_ADDR 時才使用預測服務
+    global _client
+    if not PREDICT_ADDR:
+        return None
+    with _client_lock:
+        if _client is None:
+            _client = PredictClient(PREDICT_ADDR)
+        return _client
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="本機預測服務（微批次）")
+    parser.add_argument("--addr", default=PREDICT_ADDR or DEFAULT_ADDR, help="host:port 或 Unix socket 路徑")
+    parser.add_argument("--max-batch", type=int, default=MAX_BATCH)
+    parser.add_argument("--max-wait-ms", type=float, default=MAX_WAIT * 1000)
+    args = parser.parse_args(argv)
+
+    server = make_server(args.addr, args.max_batch, args.max_wait_ms / 1000)
+    for name, width in server.widths.items():
+        try:
+            score_local(name, np.zeros((1, width)))
+        except Exception as e:
+            print(f"⚠️ 模型 {name} 預載失敗：{e}")
+    print(f"預測服務啟動於 {args.addr}（批次上限 {args.max_batch}，最長等待 {args.max_wait_ms}ms）")
+    try:
+        server.serve_forever()
+    except KeyboardInterrupt:
+        pass
+    finally:
+        server.server_close()
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,42 @@
+import numpy as np
+
+# 五個爆發等級（0–5）只有 6^5 = 7776 種輸入：一次批次預測整個定義域，之後以 base-6 編碼查表
+N_LEVELS = 6
+WINDOW = 5
+_POWERS = N_LEVELS ** np.arange(WINDOW - 1, -1, -1)
+
+
+def domain_inputs():
+    return np.indices((N_LEVELS,) * WINDOW).reshape(WINDOW, -1).T
+
+
+def encode(windows):
+    return np.asarray(windows, dtype=np.int64) @ _POWERS
+
+
+class ProbabilityTable:
+    def __init__(self, probs, model):
+        self.probs = probs
+        self.model = model
+
+    def lookup(self, window):
+        return float(self.probs[encode(window)])
+
+    def predict_proba(self, X):
+        X = np.asarray(X).reshape(-1, WINDOW)
+        if X.min(initial=0) < 0 or X.max(initial=0) >= N_LEVELS:
+            return self.model.predict_proba(X)
+        p = self.probs[encode(X)].astype(np.float64)
+        return np.column_stack([1.0 - p, p])
+
+    def verify(self, samples=256, seed=0):
+        # 隨機抽樣與即時模型比對，回傳最大誤差
+        rng = np.random.default_rng(seed)
+        X = rng.integers(0, N_LEVELS, (samples, WINDOW))
+        live = self.model.predict_proba(X)[:, 1]
+        return float(np.abs(live - self.probs[encode(X)]).max())
+
+
+def build_table(model):
+    probs = model.predict_proba(domain_inputs())[:, 1].astype(np.float32)
+    return ProbabilityTable(probs, model)
@@ -1,14 +1,79 @@
+import re
+import threading
+from collections import OrderedDict
+from urllib.parse import urlsplit, urlunsplit
+
+LEVEL_MAP = {
+    "無爆發": 0,
+    "Big Win": 1,
+    "Super Win": 2,
+    "Mega Win": 3,
+    "Ultra Win": 4,
+    "Legendary Win": 5,
+}
+
+# 依優先順序比對（legendary > ultra > mega > super > big），不分大小寫；圖片與回放網址共用
+_TIER_PATTERN = re.compile(
+    r"^(?:(?=.*?(legendary))|(?=.*?(ultra))|(?=.*?(mega))|(?=.*?(super))|(?=.*?(big)))",
+    re.IGNORECASE | re.DOTALL,
+)
+_TIER_NAMES = (None, "Legendary Win", "Ultra Win", "Mega Win", "Super Win", "Big Win")
+
+
+def classify_tier(text: str) -> str:
+    m = _TIER_PATTERN.match(text)
+    return _TIER_NAMES[m.lastindex] if m else "無爆發"
+
 
 def analyze_replay_url(url: str) -> str:
-    if "legendary" in url.lower():
-        return "Legendary Win"
-    elif "ultra" in url.lower():
-        return "Ultra Win"
-    elif "mega" in url.lower():
-        return "Mega Win"
-    elif "super" in url.lower():
-        return "Super Win"
-    elif "big" in url.lower():
-        return "Big Win"
-    else:
-        return "無爆發"
+    return classify_tier(url)
+
+
+# 回放網址分類結果的 LRU 快取，以正規化後的網址為鍵
+REPLAY_CACHE_SIZE = 4096
+_cache = OrderedDict()
+_cache_lock = threading.Lock()
+_cache_stats = {"hits": 0, "misses": 0}
+
+
+def normalize_replay_url(url: str) -> str:
+    parts = urlsplit(url.strip())
+    return urlunsplit((parts.scheme.lower(), parts.netloc.lower(), parts.path, parts.query, parts.fragment))
+
+
+def analyze_replay_urls(urls, analyzer=analyze_replay_url, executor=None):
+    keys = [(analyzer, normalize_replay_url(url)) for url in urls]
+    labels = {}
+    missing = {}
+    with _cache_lock:
+        for key, url in zip(keys, urls):
+            if key in labels or key in missing:
+                continue
+            if key in _cache:
+                _cache.move_to_end(key)
+                labels[key] = _cache[key]
+                _cache_stats["hits"] += 1
+            else:
+                missing[key] = url
+                _cache_stats["misses"] += 1
+    if missing:
+        # 分析器可替換成較重的實作，此時可傳入 executor 平行處理
+        mapper = executor.map if executor is not None else map
+        computed = dict(zip(missing, mapper(analyzer, missing.values())))
+        labels.update(computed)
+        with _cache_lock:
+            _cache.update(computed)
+            while len(_cache) > REPLAY_CACHE_SIZE:
+                _cache.popitem(last=False)
+    return [labels[key] for key in keys]
+
+
+def replay_cache_info():
+    with _cache_lock:
+        return {**_cache_stats, "size": len(_cache), "maxsize": REPLAY_CACHE_SIZE}
+
+
+def clear_replay_cache():
+    with _cache_lock:
+        _cache.clear()
+        _cache_stats.update(hits=0, misses=0)
@@ -0,0 +1,152 @@
+import hashlib
+import json
+import os
+import tempfile
+import threading
+import time
+from collections import OrderedDict
+
+# 以正規化後的 payload 為鍵快取解析後的結果（不存原始 HTML）：記憶體 TTL 層 + 選用的磁碟 LRU 層
+DEFAULT_TTL = 300
+CACHE_DIR = os.environ.get("SETH_CACHE_DIR") or None
+
+
+def payload_key(payload):
+    text = json.dumps(payload, sort_keys=True, ensure_ascii=False)
+    return hashlib.sha1(text.encode("utf-8")).hexdigest()
+
+
+class ResponseCache:
+    def __init__(self, ttl=DEFAULT_TTL, max_entries=1024, disk_dir=None, disk_max_bytes=50 * 1024 * 1024):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.disk_dir = disk_dir
+        self.disk_max_bytes = disk_max_bytes
+        self._memory = OrderedDict()
+        self._lock = threading.Lock()
+        self._stats = {"memory_hits": 0, "disk_hits": 0, "misses": 0, "bypass": 0, "refresh": 0}
+        if disk_dir:
+            os.makedirs(disk_dir, exist_ok=True)
+
+    def _disk_path(self, key):
+        return os.path.join(self.disk_dir, f"{key}.json")
+
+    def get(self, payload):
+        key = payload_key(payload)
+        now = time.time()
+        with self._lock:
+            entry = self._memory.get(key)
+            if entry is not None and entry[0] > now:
+                self._memory.move_to_end(key)
+                self._stats["memory_hits"] += 1
+                return self._decode(entry[1])
+            self._memory.pop(key, None)
+        text = self._disk_get(key, now)
+        with self._lock:
+            if text is None:
+                self._stats["misses"] += 1
+                return None
+            self._stats["disk_hits"] += 1
+            self._remember(key, text, now)
+        return self._decode(text)
+
+    def put(self, payload, result):
+        key = payload_key(payload)
+        text = json.dumps(result, ensure_ascii=False)
+        with self._lock:
+            self._remember(key, text, time.time())
+        if self.disk_dir:
+            self._disk_put(key, text)
+
+    def invalidate(self, payload):
+        key = payload_key(payload)
+        with self._lock:
+            self._memory.pop(key, None)
+        if self.disk_dir:
+            try:
+                os.remove(self._disk_path(key))
+            except FileNotFoundError:
+                pass
+
+    def count(self, event):
+        with self._lock:
+            self._stats[event] += 1
+
+    def stats(self):
+        with self._lock:
+            stats = dict(self._stats)
+            stats["size"] = len(self._memory)
+        lookups = stats["memory_hits"] + stats["disk_hits"] + stats["misses"]
+        stats["hit_rate"] = (stats["memory_hits"] + stats["disk_hits"]) / lookups if lookups else 0.0
+        return stats
+
+    def _remember(self, key, text, now):
+        self._memory[key] = (now + self.ttl, text)
+        self._memory.move_to_end(key)
+        while len(self._memory) > self.max_entries:
+            self._memory.popitem(last=False)
+
+    @staticmethod
+    def _decode(text):
+        result = json.loads(text)
+        result["cached"] = True
+        return result
+
+    def _disk_get(self, key, now):
+        if not self.disk_dir:
+            return None
+        path = self._disk_path(key)
+        try:
+            if os.path.getmtime(path) + self.ttl < now:
+                os.remove(path)
+                return None
+            with open(path, encoding="utf-8") as f:
+                text = f.read()
+            # 以 atime 記錄最近使用時間，淘汰時從最久未使用的檔案開始
+            os.utime(path, (now, os.path.getmtime(path)))
+            return text
+        except FileNotFoundError:
+            return None
+
+    def _disk_put(self, key, text):
+        # 暫存檔名唯一：多個執行緒同時寫同一個鍵時各自 replace，最後寫入者勝出
+        fd, tmp_path = tempfile.mkstemp(dir=self.disk_dir, prefix=f"{key}.", suffix=".tmp")
+        try:
+            with os.fdopen(fd, "w", encoding="utf-8") as f:
+                f.write(text)
+            os.replace(tmp_path, self._disk_path(key))
+        except BaseException:
+            os.unlink(tmp_path)
+            raise
+        self._evict_disk()
+
+    def _evict_disk(self):
+        entries = []
+        total = 0
+        for entry in os.scandir(self.disk_dir):
+            if entry.name.endswith(".json"):
+                st = entry.stat()
+                entries.append((max(st.st_atime, st.st_mtime), st.st_size, entry.path))
+                total += st.st_size
+        if total <= self.disk_max_bytes:
+            return
+        for _, size, path in sorted(entries):
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
+            if total <= self.disk_max_bytes:
+                break
+
+
+_cache = None
+_cache_lock = threading.Lock()
+
+
+def get_cache():
+    global _cache
+    with _cache_lock:
+        if _cache is None:
+            _cache = ResponseCache(disk_dir=CACHE_DIR)
+        return _cache
@@ -1,37 +1,147 @@
-from bs4 import BeautifulSoup
-import pandas as pd
+import atexit
+import queue
+import threading
+from contextlib import contextmanager
 from datetime import datetime
-import time
-import undetected_chromedriver as uc
 
-def parse_haoting_page():
-    try:
+import pandas as pd
+
+from history_store import COLUMNS, upsert_history
+from timing import span
+
+HAOTING_URL = "https://ww.haoting.info/nickaa"
+PAGE_TIMEOUT = 15
+
+
+def parse_haoting_html(html, date=None):
+    from bs4 import BeautifulSoup
+
+    soup = BeautifulSoup(html, "html.parser")
+    table = soup.find("table")
+    rows = table.find_all("tr")[1:] if table else []
+
+    date = date or datetime.now().strftime("%Y-%m-%d")
+    data = []
+    for row in rows:
+        cols = row.find_all("td")
+        if len(cols) < 5: continue
+        plays = int(cols[1].text.strip())
+        small = 1 if "小分" in cols[2].text else 0
+        free = 1 if "免費" in cols[2].text else 0
+        jackpot = 1 if "爆" in cols[3].text else 0
+        burst_index = round(plays * 0.05 + small * 10 + free * 50, 2)
+        data.append([date, plays, jackpot, small, free, burst_index, cols[0].text.strip()])
+    return pd.DataFrame(data, columns=COLUMNS)
+
+
+def parse_snapshot(path, date=None):
+    # 離線模式：解析已儲存的頁面快照，不需要瀏覽器
+    with open(path, encoding="utf-8") as f:
+        return parse_haoting_html(f.read(), date)
+
+
+class BrowserSession:
+    # 長時間保留同一個 Chrome，只在結果表格出現前等待（最多 timeout 秒）
+    def __init__(self, headless=True, timeout=PAGE_TIMEOUT):
+        self.headless = headless
+        self.timeout = timeout
+        self._driver = None
+        self._lock = threading.Lock()
+
+    def _start(self):
+        import undetected_chromedriver as uc
+
         options = uc.ChromeOptions()
-        options.headless = True
-        driver = uc.Chrome(options=options)
-        driver.get("https://ww.haoting.info/nickaa")
-        time.sleep(6)  # 等待 JS 載入
-
-        soup = BeautifulSoup(driver.page_source, "html.parser")
-        driver.quit()
-
-        table = soup.find("table")
-        rows = table.find_all("tr")[1:] if table else []
-
-        data = []
-        for row in rows:
-            cols = row.find_all("td")
-            if len(cols) < 5: continue
-            date = datetime.now().strftime("%Y-%m-%d")
-            plays = int(cols[1].text.strip())
-            small = 1 if "小分" in cols[2].text else 0
-            free = 1 if "免費" in cols[2].text else 0
-            jackpot = 1 if "爆" in cols[3].text else 0
-            burst_index = round(plays * 0.05 + small * 10 + free * 50, 2)
-            data.append([date, plays, jackpot, small, free, burst_index])
-
-        df = pd.DataFrame(data, columns=["日期", "局數", "爆金", "小分", "免費遊戲", "爆發指數"])
-        df.to_csv("data/haoting_data.csv", index=False)
+        options.headless = self.headless
+        self._driver = uc.Chrome(options=options)
+
+    def fetch(self, url=HAOTING_URL, timeout=None):
+        from selenium.common.exceptions import TimeoutException, WebDriverException
+        from selenium.webdriver.common.by import By
+        from selenium.webdriver.support import expected_conditions as EC
+        from selenium.webdriver.support.ui import WebDriverWait
+
+        with self._lock:
+            for attempt in range(2):
+                if self._driver is None:
+                    self._start()
+                try:
+                    self._driver.get(url)
+                    WebDriverWait(self._driver, timeout or self.timeout).until(
+                        EC.presence_of_element_located((By.CSS_SELECTOR, "table tr td"))
+                    )
+                    return self._driver.page_source
+                except TimeoutException:
+                    raise
+                except WebDriverException:
+                    # 瀏覽器當掉時重新啟動一次
+                    self._quit()
+                    if attempt:
+                        raise
+
+    def _quit(self):
+        if self._driver is not None:
+            try:
+                self._driver.quit()
+            finally:
+                self._driver = None
+
+    def close(self):
+        with self._lock:
+            self._quit()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+class BrowserPool:
+    def __init__(self, size=2, headless=True, timeout=PAGE_TIMEOUT):
+        self._sessions = [BrowserSession(headless, timeout) for _ in range(size)]
+        self._idle = queue.Queue()
+        for session in self._sessions:
+            self._idle.put(session)
+
+    @contextmanager
+    def session(self):
+        session = self._idle.get()
+        try:
+            yield session
+        finally:
+            self._idle.put(session)
+
+    def fetch(self, url=HAOTING_URL, timeout=None):
+        with self.session() as session:
+            return session.fetch(url, timeout)
+
+    def close(self):
+        for session in self._sessions:
+            session.close()
+
+
+_browser = None
+_browser_lock = threading.Lock()
+
+
+def get_browser():
+    global _browser
+    with _browser_lock:
+        if _browser is None:
+            _browser = BrowserSession()
+            atexit.register(_browser.close)
+        return _browser
+
+
+def parse_haoting_page(browser=None, url=HAOTING_URL):
+    try:
+        with span("scrape_fetch"):
+            html = (browser or get_browser()).fetch(url)
+        with span("scrape_parse"):
+            df = parse_haoting_html(html)
+        with span("history_upsert"):
+            upsert_history(df)
         return df
 
     except Exception as e:
@@ -0,0 +1,173 @@
+import argparse
+import json
+import os
+import sys
+import time
+
+import numpy as np
+import pandas as pd
+
+from analyzer import DATA_PATH, FEATURES, MODEL_PATH, load_jackpot_model, read_rows_since, round_pnl
+from history_store import load_tail
+from model_registry import atomic_save
+from timing import span
+
+# 策略參數掃描：歷史資料只評分一次並快取機率向量，再以廣播一次算出所有 (門檻, 注額, 賠率) 組合
+# 依 analyzer.round_pnl 的下注規則，同一門檻下的資金曲線為 capital + bet_unit × ((payout+1)·累計命中 − 累計下注)，
+# 因此最終資金可直接由累計值求得，最大回撤也只需對 (門檻, 賠率) 計算後再乘上注額
+PROBS_CACHE = "data/sweep_probs.npz"
+THRESHOLDS = np.round(np.arange(0.50, 0.951, 0.01), 2)
+BET_UNITS = [5, 10, 20, 50, 100]
+PAYOUTS = [2, 3, 4, 5, 6]
+
+
+def _stat(path):
+    st = os.stat(path)
+    return [st.st_mtime_ns, st.st_size]
+
+
+def score_history(rounds=None, cache_path=PROBS_CACHE):
+    # 模型或歷史資料變動時才重新評分
+    key = json.dumps({"model": _stat(MODEL_PATH), "data": _stat(DATA_PATH), "rounds": rounds})
+    if cache_path and os.path.exists(cache_path):
+        with np.load(cache_path) as cached:
+            if str(cached["key"]) == key:
+                return cached["probs"], cached["outcomes"]
+    if rounds:
+        df = load_tail(rounds, DATA_PATH)
+    else:
+        columns, df, offset = read_rows_since(0, None)
+    if df.empty or '爆金' not in df.columns:
+        raise ValueError("❌ 無可用資料進行參數掃描")
+    with span("sweep_predict"):
+        probs = load_jackpot_model().predict_proba(df[FEATURES])[:, 1]
+    outcomes = df['爆金'].to_numpy() == 1
+    if cache_path:
+        os.makedirs(os.path.dirname(cache_path) or ".", exist_ok=True)
+        atomic_save(cache_path, lambda p: np.savez(p, key=np.array(key), probs=probs, outcomes=outcomes))
+    return probs, outcomes
+
+
+def sweep(probs, outcomes, thresholds=THRESHOLDS, bet_units=BET_UNITS, payouts=PAYOUTS, capital=1000,
+          max_cells=20_000_000):
+    thresholds = np.asarray(thresholds, dtype=np.float64)
+    units = np.asarray(bet_units, dtype=np.float64)
+    pays = np.asarray(payouts, dtype=np.float64)
+    n = len(probs)
+    bets = np.empty(len(thresholds), dtype=np.int64)
+    hits = np.empty(len(thresholds), dtype=np.int64)
+    net = np.empty((len(thresholds), len(pays)))
+    drawdown = np.empty((len(thresholds), len(pays)))
+    # 以門檻分塊，(門檻, 賠率, 局) 的暫存陣列不超過 max_cells
+    step = max(1, max_cells // max(n * len(pays), 1))
+    for start in range(0, len(thresholds), step):
+        t = thresholds[start:start + step]
+        bet = probs[None, :] > t[:, None]
+        cum_bets = np.cumsum(bet, axis=1)
+        cum_hits = np.cumsum(bet & outcomes[None, :], axis=1)
+        path = (pays[None, :, None] + 1) * cum_hits[:, None, :] - cum_bets[:, None, :]
+        peak = np.maximum(np.maximum.accumulate(path, axis=2), 0)
+        bets[start:start + step] = cum_bets[:, -1] if n else 0
+        hits[start:start + step] = cum_hits[:, -1] if n else 0
+        net[start:start + step] = path[:, :, -1] if n else 0
+        drawdown[start:start + step] = (peak - path).max(axis=2, initial=0)
+
+    shape = (len(thresholds), len(units), len(pays))
+    t_idx, u_idx, p_idx = (a.ravel() for a in np.indices(shape))
+    with np.errstate(invalid="ignore", divide="ignore"):
+        hit_rate = np.where(bets > 0, hits / np.maximum(bets, 1), np.nan)
+    board = pd.DataFrame({
+        "threshold": thresholds[t_idx],
+        "bet_unit": units[u_idx],
+        "payout": pays[p_idx],
+        "bets": bets[t_idx],
+        "hits": hits[t_idx],
+        "hit_rate": hit_rate[t_idx],
+        "final_balance": capital + units[u_idx] * net[t_idx, p_idx],
+        "max_drawdown": units[u_idx] * drawdown[t_idx, p_idx],
+    })
+    board["return"] = board["final_balance"] / capital - 1
+    return board.sort_values(["final_balance", "max_drawdown"], ascending=[False, True], ignore_index=True)
+
+
+def verify_sweep(board, probs, outcomes, capital=1000, samples=20, seed=0):
+    # 抽樣幾組參數以 round_pnl 逐局重算，回傳最終資金與最大回撤的最大誤差
+    rows = board.sample(min(samples, len(board)), random_state=seed)
+    error = 0.0
+    for row in rows.itertuples(index=False):
+        _, _, pnl = round_pnl(probs, outcomes, row.bet_unit, row.threshold, row.payout)
+        balance = capital + np.cumsum(pnl)
+        drawdown = (np.maximum(np.maximum.accumulate(balance), capital) - balance).max(initial=0)
+        final = balance[-1] if len(balance) else capital
+        error = max(error, abs(final - row.final_balance), abs(drawdown - row.max_drawdown))
+    return float(error)
+
+
+def plot_sweep(board, path, bet_unit=None):
+    # 固定注額，畫出門檻 × 賠率的最終資金熱圖
+    import matplotlib
+
+    matplotlib.use("Agg")
+    import matplotlib.pyplot as plt
+
+    bet_unit = board["bet_unit"].iloc[0] if bet_unit is None else bet_unit
+    grid = board[board["bet_unit"] == bet_unit].pivot(index="payout", columns="threshold", values="final_balance")
+    fig, ax = plt.subplots(figsize=(10, 4))
+    image = ax.imshow(grid.to_numpy(), aspect="auto", origin="lower", cmap="RdYlGn",
+                      extent=[grid.columns.min(), grid.columns.max(), -0.5, len(grid.index) - 0.5])
+    ax.set_yticks(range(len(grid.index)), [f"{p:g}x" for p in grid.index])
+    ax.set_xlabel("threshold")
+    ax.set_ylabel("payout")
+    ax.set_title(f"final balance (bet_unit={bet_unit:g})")
+    fig.colorbar(image, ax=ax)
+    fig.tight_layout()
+    fig.savefig(path, dpi=120)
+    plt.close(fig)
+
+
+def _floats(text):
+    # "0.5:0.95:0.05" 表示範圍，"5,10,20" 表示清單
+    if ":" in text:
+        start, stop, step = (float(x) for x in text.split(":"))
+        return np.round(np.arange(start, stop + step / 2, step), 6)
+    return np.array([float(x) for x in text.split(",")])
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="下注策略參數掃描")
+    parser.add_argument("--thresholds", type=_floats, default=THRESHOLDS, help="例如 0.5:0.95:0.01 或 0.6,0.7")
+    parser.add_argument("--bet-units", type=_floats, default=BET_UNITS)
+    parser.add_argument("--payouts", type=_floats, default=PAYOUTS)
+    parser.add_argument("--capital", type=float, default=1000)
+    parser.add_argument("--rounds", type=int, default=None, help="只使用最近 N 局（預設全部）")
+    parser.add_argument("--top", type=int, default=20)
+    parser.add_argument("-o", "--output", default=None, help="完整排名輸出 CSV")
+    parser.add_argument("--chart", default=None, help="輸出熱圖 PNG（需 matplotlib）")
+    parser.add_argument("--verify", type=int, default=0, metavar="N", help="抽樣 N 組以逐局回測比對")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        probs, outcomes = score_history(args.rounds)
+    except (ValueError, FileNotFoundError) as e:
+        print(e)
+        return 1
+    board = sweep(probs, outcomes, args.thresholds, args.bet_units, args.payouts, args.capital)
+    if args.output:
+        board.to_csv(args.output, index=False)
+    if args.chart:
+        try:
+            plot_sweep(board, args.chart)
+        except ImportError:
+            print("⚠️ 未安裝 matplotlib，略過圖表")
+    print(board.head(args.top).to_string(index=False))
+    print(f"共 {len(board)} 組參數、{len(probs)} 局，耗時 {time.perf_counter() - start:.2f}s")
+    if args.verify:
+        error = verify_sweep(board, probs, outcomes, args.capital, args.verify)
+        print(f"抽樣 {args.verify} 組逐局比對，最大誤差 {error:.2e}")
+        return 0 if error < 1e-6 else 1
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,95 @@
+import cProfile
+import io
+import json
+import os
+import pstats
+import threading
+import time
+from collections import defaultdict, deque
+from contextlib import contextmanager, nullcontext
+
+import numpy as np
+
+# 各階段耗時：記憶體內保留最近 WINDOW 筆計算 p50/p95/p99，可選擇輸出 JSON lines
+WINDOW = 1000
+_enabled = os.environ.get("SETH_TIMING", "1") != "0"
+_samples = defaultdict(lambda: deque(maxlen=WINDOW))
+_counts = defaultdict(int)
+_lock = threading.Lock()
+_log_file = None
+_NULL = nullcontext()
+
+
+class _Span:
+    __slots__ = ("name", "start")
+
+    def __init__(self, name):
+        self.name = name
+
+    def __enter__(self):
+        self.start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        record(self.name, time.perf_counter() - self.start)
+
+
+def span(name):
+    # 停用時回傳共用的 nullcontext，幾乎沒有額外成本
+    return _Span(name) if _enabled else _NULL
+
+
+def record(name, seconds):
+    with _lock:
+        _samples[name].append(seconds)
+        _counts[name] += 1
+        if _log_file is not None:
+            _log_file.write(json.dumps({"ts": time.time(), "stage": name, "ms": seconds * 1000}) + "\n")
+            _log_file.flush()
+
+
+def configure(enabled=None, log_path=None):
+    global _enabled, _log_file
+    with _lock:
+        if enabled is not None:
+            _enabled = enabled
+        if log_path is not None:
+            if _log_file is not None:
+                _log_file.close()
+            _log_file = open(log_path, "a", encoding="utf-8") if log_path else None
+
+
+def summary():
+    with _lock:
+        snapshot = {name: (np.array(values), _counts[name]) for name, values in _samples.items() if values}
+    stats = {}
+    for name, (values, count) in snapshot.items():
+        p50, p95, p99 = (np.percentile(values, [50, 95, 99]) * 1000).tolist()
+        stats[name] = {"count": count, "p50_ms": p50, "p95_ms": p95, "p99_ms": p99, "mean_ms": float(values.mean() * 1000)}
+    return stats
+
+
+def reset():
+    with _lock:
+        _samples.clear()
+        _counts.clear()
+
+
+@contextmanager
+def profile_request(top=30, sort="cumulative"):
+    # 針對單一請求開啟 cProfile；結束後 report["text"] 為前 top 名的統計
+    report = {}
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield report
+    finally:
+        profiler.disable()
+        out = io.StringIO()
+        pstats.Stats(profiler, stream=out).sort_stats(sort).print_stats(top)
+        report["text"] = out.getvalue()
+        report["stats"] = profiler
+
+
+if os.environ.get("SETH_TIMING_LOG"):
+    configure(log_path=os.environ["SETH_TIMING_LOG"])
@@ -0,0 +1,199 @@
+import ast
+import atexit
+import os
+import threading
+import time
+
+import numpy as np
+
+from model_registry import file_lock
+
+# 訓練紀錄分成兩個檔案：固定長度的紀錄檔 (.rec) 與連續存放爆發等級的 uint8 檔 (.tiers)
+LOG_PATH = "daily_training_log"
+RECORD_DTYPE = np.dtype([
+    ("ts", "<i8"),
+    ("serial", "S16"),
+    ("account", "S32"),
+    ("table", "S16"),
+    ("prob", "<f4"),
+    ("bet", "u1"),
+    ("tier_offset", "<i8"),
+    ("tier_len", "<u2"),
+])
+
+
+def _paths(path):
+    return f"{path}.rec", f"{path}.tiers"
+
+
+def _encode(value, size):
+    # 在字元邊界截斷，避免切斷多位元組的 UTF-8 字元
+    return str(value).encode("utf-8")[:size].decode("utf-8", "ignore").encode("utf-8")
+
+
+def _recover(path):
+    # 當機後只保留完整的紀錄：先寫等級再寫紀錄，因此未完成的尾端可直接截斷
+    with file_lock(path):
+        return _recover_locked(path)
+
+
+def _recover_locked(path):
+    rec_path, tier_path = _paths(path)
+    if not os.path.exists(rec_path):
+        open(rec_path, "ab").close()
+    if not os.path.exists(tier_path):
+        open(tier_path, "ab").close()
+    count = os.path.getsize(rec_path) // RECORD_DTYPE.itemsize
+    tier_size = os.path.getsize(tier_path)
+    records = np.fromfile(rec_path, dtype=RECORD_DTYPE, count=count)
+    ends = records["tier_offset"] + records["tier_len"]
+    valid = int(np.searchsorted(ends, tier_size, side="right")) if count else 0
+    tier_end = int(ends[valid - 1]) if valid else 0
+    with open(rec_path, "r+b") as f:
+        f.truncate(valid * RECORD_DTYPE.itemsize)
+    with open(tier_path, "r+b") as f:
+        f.truncate(tier_end)
+    return valid, tier_end
+
+
+def _tail_locked(path):
+    # 每次寫入前只檢查尾端（O(1)）：紀錄檔截到整筆邊界、等級檔截掉沒有紀錄指向的殘留位元組
+    rec_path, tier_path = _paths(path)
+    if not os.path.exists(rec_path) or not os.path.exists(tier_path):
+        return _recover_locked(path)
+    rec_size = os.path.getsize(rec_path)
+    count = rec_size // RECORD_DTYPE.itemsize
+    if not count:
+        return _recover_locked(path)
+    last = np.fromfile(rec_path, dtype=RECORD_DTYPE, count=1, offset=(count - 1) * RECORD_DTYPE.itemsize)[0]
+    tier_end = int(last["tier_offset"]) + int(last["tier_len"])
+    tier_size = os.path.getsize(tier_path)
+    if tier_end > tier_size:
+        return _recover_locked(path)
+    if rec_size != count * RECORD_DTYPE.itemsize:
+        with open(rec_path, "r+b") as f:
+            f.truncate(count * RECORD_DTYPE.itemsize)
+    if tier_size != tier_end:
+        with open(tier_path, "r+b") as f:
+            f.truncate(tier_end)
+    return count, tier_end
+
+
+class TrainingLogWriter:
+    def __init__(self, path=LOG_PATH, flush_every=64, fsync=True, flush_interval=None):
+        # flush_interval：有待寫入的紀錄時，最多延遲幾秒就寫出（不必等滿 flush_every 筆）
+        self.path = path
+        self.flush_every = flush_every
+        self.flush_interval = flush_interval
+        self.fsync = fsync
+        self._lock = threading.Lock()
+        self._records = []
+        self._tiers = []
+        self._timer = None
+        self._count, _ = _recover(path)
+        self._pending_tiers = 0
+        atexit.register(self.flush)
+
+    def append(self, serial, account, tiers, prob, bet, table="", ts=None):
+        tiers = np.asarray(tiers, dtype=np.uint8)
+        with self._lock:
+            # tier_offset 先存批次內的相對位置，寫入時再加上等級檔的實際大小
+            self._records.append((
+                int(time.time() if ts is None else ts),
+                _encode(serial, 16),
+                _encode(account, 32),
+                _encode(table, 16),
+                prob,
+                bool(bet),
+                self._pending_tiers,
+                len(tiers),
+            ))
+            self._tiers.append(tiers)
+            self._pending_tiers += len(tiers)
+            if len(self._records) >= self.flush_every:
+                self._flush()
+            elif self.flush_interval and self._timer is None:
+                self._timer = threading.Timer(self.flush_interval, self.flush)
+                self._timer.daemon = True
+                self._timer.start()
+
+    def flush(self):
+        with self._lock:
+            self._flush()
+
+    def _flush(self):
+        if self._timer is not None:
+            self._timer.cancel()
+            self._timer = None
+        if not self._records:
+            return
+        rec_path, tier_path = _paths(self.path)
+        records = np.array(self._records, dtype=RECORD_DTYPE)
+        with file_lock(self.path):
+            # 其他行程可能已寫入，位移一律以持鎖時的檔案大小為準；同時清掉先前當機留下的殘缺尾端
+            count, tier_end = _tail_locked(self.path)
+            records["tier_offset"] += tier_end
+            with open(tier_path, "ab") as f:
+                f.write(np.concatenate(self._tiers).tobytes())
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+            with open(rec_path, "ab") as f:
+                f.write(records.tobytes())
+                f.flush()
+                if self.fsync:
+                    os.fsync(f.fileno())
+        self._count = count + len(records)
+        self._records.clear()
+        self._tiers.clear()
+        self._pending_tiers = 0
+
+    def close(self):
+        self.flush()
+        atexit.unregister(self.flush)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+
+_writers = {}
+_writers_lock = threading.Lock()
+
+
+def get_writer(path=LOG_PATH, flush_every=64, flush_interval=2.0):
+    # 共用寫入器批次寫出；未滿 flush_every 筆時最多延遲 flush_interval 秒，結束時由 atexit 補寫
+    with _writers_lock:
+        if path not in _writers:
+            _writers[path] = TrainingLogWriter(path, flush_every=flush_every, flush_interval=flush_interval)
+        return _writers[path]
+
+
+def read_training_log(path=LOG_PATH):
+    # 一次讀入整份紀錄：回傳結構化紀錄陣列與攤平的等級陣列
+    rec_path, tier_path = _paths(path)
+    if not os.path.exists(rec_path):
+        return np.empty(0, dtype=RECORD_DTYPE), np.empty(0, dtype=np.uint8)
+    count = os.path.getsize(rec_path) // RECORD_DTYPE.itemsize
+    records = np.fromfile(rec_path, dtype=RECORD_DTYPE, count=count)
+    tiers = np.fromfile(tier_path, dtype=np.uint8) if os.path.exists(tier_path) else np.empty(0, dtype=np.uint8)
+    ends = records["tier_offset"] + records["tier_len"]
+    return records[ends <= len(tiers)], tiers
+
+
+def split_tiers(records, tiers):
+    return [tiers[o:o + n] for o, n in zip(records["tier_offset"].tolist(), records["tier_len"].tolist())]
+
+
+def migrate_csv_log(csv_path="daily_training_log.csv", path=LOG_PATH):
+    import pandas as pd
+
+    df = pd.read_csv(csv_path)
+    with TrainingLogWriter(path, flush_every=4096) as writer:
+        for row in df.itertuples(index=False):
+            ts = pd.Timestamp(row.日期時間).timestamp()
+            writer.append(row.序號, row.帳號, ast.literal_eval(row.爆發分數陣列), row.爆金機率,
+                          str(row.下注建議).startswith("✅"), ts=ts)
+    return len(df)
@@ -0,0 +1,128 @@
+import json
+
+import numpy as np
+
+# 將 XGBoost 二元分類模型的樹攤平成 NumPy 陣列，單筆與批次預測都不經過 XGBoost 呼叫
+
+
+def _base_margin(booster):
+    config = json.loads(booster.save_config())
+    learner = config["learner"]
+    objective = learner["objective"]["name"]
+    if objective != "binary:logistic":
+        raise ValueError(f"不支援的 objective：{objective}")
+    base_score = float(str(learner["learner_model_param"]["base_score"]).strip("[]"))
+    return float(np.log(base_score / (1.0 - base_score)))
+
+
+def _walk(node, nodes):
+    nodes.append(node)
+    for child in node.get("children", ()):
+        _walk(child, nodes)
+
+
+class CompiledEnsemble:
+    def __init__(self, feature, threshold, left, right, missing, value, roots, depth, base_margin, feature_names=None):
+        self.feature = feature
+        self.threshold = threshold
+        self.left = left
+        self.right = right
+        self.missing = missing
+        self.value = value
+        self.roots = roots
+        self.depth = depth
+        self.base_margin = base_margin
+        self.feature_names = feature_names
+        self.n_features = int(feature.max()) + 1 if len(feature) else 0
+        if feature_names:
+            self.n_features = len(feature_names)
+
+    def _as_matrix(self, X):
+        if hasattr(X, "columns") and self.feature_names:
+            X = X[self.feature_names]
+        X = np.asarray(X, dtype=np.float32)
+        return X.reshape(1, -1) if X.ndim == 1 else X
+
+    def predict_margin(self, X):
+        X = self._as_matrix(X)
+        n = X.shape[0]
+        flat = X.ravel()
+        row_offset = (np.arange(n, dtype=np.int64) * X.shape[1])[None, :]
+        node = np.broadcast_to(self.roots[:, None], (len(self.roots), n))
+        for _ in range(self.depth):
+            x = flat[row_offset + self.feature[node]]
+            nxt = np.where(x < self.threshold[node], self.left[node], self.right[node])
+            node = np.where(np.isnan(x), self.missing[node], nxt)
+        return self.value[node].sum(axis=0, dtype=np.float64) + self.base_margin
+
+    def predict_proba(self, X):
+        p = 1.0 / (1.0 + np.exp(-self.predict_margin(X)))
+        return np.column_stack([1.0 - p, p])
+
+    def predict(self, X):
+        return (self.predict_proba(X)[:, 1] > 0.5).astype(int)
+
+    def save(self, path):
+        np.savez(path, feature=self.feature, threshold=self.threshold, left=self.left, right=self.right,
+                 missing=self.missing, value=self.value, roots=self.roots, depth=self.depth,
+                 base_margin=self.base_margin, feature_names=np.array(self.feature_names or [], dtype=str))
+
+    @classmethod
+    def load(cls, path):
+        with np.load(path) as d:
+            names = d["feature_names"].tolist() or None
+            return cls(d["feature"], d["threshold"], d["left"], d["right"], d["missing"], d["value"],
+                       d["roots"], int(d["depth"]), float(d["base_margin"]), names)
+
+
+def compile_model(model):
+    booster = model.get_booster() if hasattr(model, "get_booster") else model
+    base_margin = _base_margin(booster)
+    names = list(booster.feature_names) if booster.feature_names else None
+    index = {name: i for i, name in enumerate(names)} if names else {}
+    dumps = booster.get_dump(dump_format="json")
+    # 提早停止時，predict_proba 只使用到 best_iteration 為止的樹
+    best = booster.attr("best_iteration")
+    if best is not None:
+        per_round = len(dumps) // booster.num_boosted_rounds()
+        dumps = dumps[:(int(best) + 1) * per_round]
+
+    feature, threshold, left, right, missing, value, roots = [], [], [], [], [], [], []
+    depth = 0
+    for dump in dumps:
+        nodes = []
+        _walk(json.loads(dump), nodes)
+        offset = len(feature)
+        roots.append(offset)
+        size = max(n["nodeid"] for n in nodes) + 1
+        feature.extend([0] * size)
+        threshold.extend([0.0] * size)
+        value.extend([0.0] * size)
+        ids = [offset + i for i in range(size)]
+        left.extend(ids)
+        right.extend(ids)
+        missing.extend(ids)
+        for n in nodes:
+            i = offset + n["nodeid"]
+            depth = max(depth, n.get("depth", 0) + 1)
+            if "leaf" in n:
+                value[i] = n["leaf"]
+                continue
+            split = n["split"]
+            feature[i] = index[split] if split in index else int(split.lstrip("f"))
+            threshold[i] = n["split_condition"]
+            left[i] = offset + n["yes"]
+            right[i] = offset + n["no"]
+            missing[i] = offset + n["missing"]
+    return CompiledEnsemble(
+        np.array(feature, dtype=np.int64),
+        np.array(threshold, dtype=np.float32),
+        np.array(left, dtype=np.int64),
+        np.array(right, dtype=np.int64),
+        np.array(missing, dtype=np.int64),
+        np.array(value, dtype=np.float32),
+        np.array(roots, dtype=np.int64),
+        depth,
+        base_margin,
+        names,
+    )
@@ -0,0 +1,135 @@
+import argparse
+import os
+import sys
+import time
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+from analyzer import FEATURES, MODEL_PATH, read_rows_since, save_checkpoint
+from model_registry import atomic_save
+
+# 以時間順序的 k-fold 交叉驗證搜尋超參數，試驗分散到多個行程執行
+LEADERBOARD_PATH = "models/tuning_leaderboard.csv"
+EARLY_STOP_FRACTION = 0.2
+PARAM_GRID = {
+    "max_depth": [3, 4, 6, 8],
+    "learning_rate": [0.03, 0.1, 0.3],
+    "subsample": [0.7, 1.0],
+    "colsample_bytree": [0.7, 1.0],
+    "min_child_weight": [1, 5],
+}
+
+_X = _y = _folds = None
+
+
+def _init_worker(X, y, folds):
+    # 每個行程只接收一次訓練矩陣，之後所有試驗共用
+    global _X, _y, _folds
+    _X, _y, _folds = X, y, folds
+
+
+def _run_trial(params, max_rounds, early_stopping):
+    import xgboost as xgb
+    from sklearn.metrics import accuracy_score, log_loss
+
+    losses, accs, iterations = [], [], []
+    start = time.perf_counter()
+    for train_idx, val_idx in _folds:
+        # 早停只看訓練折的尾段，驗證折完全不參與訓練，分數才不會偏樂觀
+        cut = int(len(train_idx) * (1 - EARLY_STOP_FRACTION))
+        fit_idx, stop_idx = train_idx[:cut], train_idx[cut:]
+        y_fit, y_val = _y[fit_idx], _y[val_idx]
+        if len(np.unique(y_fit)) < 2 or not len(stop_idx):
+            continue
+        model = xgb.XGBClassifier(
+            **params, n_estimators=max_rounds, early_stopping_rounds=early_stopping,
+            eval_metric="logloss", n_jobs=1,
+        )
+        model.fit(_X[fit_idx], y_fit, eval_set=[(_X[stop_idx], _y[stop_idx])], verbose=False)
+        prob = model.predict_proba(_X[val_idx])[:, 1]
+        losses.append(log_loss(y_val, prob, labels=[0, 1]))
+        accs.append(accuracy_score(y_val, prob > 0.5))
+        iterations.append(model.best_iteration + 1)
+    return {
+        **params,
+        "logloss": float(np.mean(losses)) if losses else float("inf"),
+        "logloss_std": float(np.std(losses)) if losses else float("nan"),
+        "accuracy": float(np.mean(accs)) if accs else float("nan"),
+        "rounds": int(np.mean(iterations)) if iterations else max_rounds,
+        "seconds": time.perf_counter() - start,
+    }
+
+
+def load_matrix():
+    columns, df, offset = read_rows_since(0, None)
+    if df.empty or '爆金' not in df.columns:
+        raise ValueError("❌ 資料格式錯誤或為空")
+    return df[FEATURES].to_numpy(np.float32), df['爆金'].to_numpy(np.int32), offset
+
+
+def make_trials(search="grid", n_trials=20, seed=42, grid=PARAM_GRID):
+    from sklearn.model_selection import ParameterGrid, ParameterSampler
+
+    if search == "grid":
+        return list(ParameterGrid(grid))
+    return list(ParameterSampler(grid, n_iter=n_trials, random_state=seed))
+
+
+def tune(search="grid", n_trials=20, folds=5, max_rounds=500, early_stopping=20, workers=None, promote=False):
+    from sklearn.model_selection import TimeSeriesSplit
+
+    X, y, offset = load_matrix()
+    splits = list(TimeSeriesSplit(n_splits=folds).split(X))
+    trials = make_trials(search, n_trials)
+    results = []
+    with ProcessPoolExecutor(max_workers=workers or os.cpu_count(), initializer=_init_worker,
+                             initargs=(X, y, splits)) as pool:
+        futures = [pool.submit(_run_trial, params, max_rounds, early_stopping) for params in trials]
+        for future in as_completed(futures):
+            results.append(future.result())
+
+    board = pd.DataFrame(results).sort_values("logloss").reset_index(drop=True)
+    board.insert(0, "run_at", pd.Timestamp.now().strftime("%Y-%m-%d %H:%M:%S"))
+    board.to_csv(LEADERBOARD_PATH, mode="a", header=not os.path.exists(LEADERBOARD_PATH), index=False)
+    if promote and np.isfinite(board.loc[0, "logloss"]):
+        promote_best(board.iloc[0], X, y, offset)
+    return board
+
+
+def promote_best(best, X, y, offset):
+    import xgboost as xgb
+
+    params = {k: best[k].item() if hasattr(best[k], "item") else best[k] for k in PARAM_GRID if k in best}
+    model = xgb.XGBClassifier(**params, n_estimators=int(best["rounds"]), eval_metric="logloss")
+    model.fit(pd.DataFrame(X, columns=FEATURES), y)
+    atomic_save(MODEL_PATH, model.save_model)
+    save_checkpoint(offset, len(y))
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="爆金模型超參數搜尋")
+    parser.add_argument("--search", choices=["grid", "random"], default="random")
+    parser.add_argument("--trials", type=int, default=20)
+    parser.add_argument("--folds", type=int, default=5)
+    parser.add_argument("--max-rounds", type=int, default=500)
+    parser.add_argument("--early-stopping", type=int, default=20)
+    parser.add_argument("--workers", type=int, default=None)
+    parser.add_argument("--promote", action="store_true", help="以最佳參數重新訓練並覆寫 MODEL_PATH")
+    args = parser.parse_args(argv)
+
+    start = time.perf_counter()
+    try:
+        board = tune(args.search, args.trials, args.folds, args.max_rounds, args.early_stopping,
+                     args.workers, args.promote)
+    except ValueError as e:
+        print(e)
+        return 1
+    print(board.drop(columns="run_at").head(10).to_string(index=False))
+    print(f"共 {len(board)} 組參數，耗時 {time.perf_counter() - start:.1f}s")
+    return 0
+
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,48 @@
+import re
+from html import unescape
+
+from replay_utils import classify_tier
+
+# 單次掃描回應內容：略過註解與 script/style，只擷取 <img src> 與 <a href>，不建立 DOM
+_TAG_PATTERN = re.compile(
+    r"<!--.*?-->"
+    r"|<(script|style)\b.*?</\1\s*>"
+    r"|<(img|a)\b((?:[^>\"']|\"[^\"]*\"|'[^']*')*)>",
+    re.IGNORECASE | re.DOTALL,
+)
+_ATTR_PATTERN = re.compile(
+    r"""(?:^|\s)(src|href)\s*=\s*(?:"([^"]*)"|'([^']*)'|([^\s"'>]+))""",
+    re.IGNORECASE,
+)
+
+
+def _attr(attrs, name):
+    for m in _ATTR_PATTERN.finditer(attrs):
+        if m.group(1).lower() == name:
+            value = m.group(2)
+            if value is None:
+                value = m.group(3) if m.group(3) is not None else m.group(4)
+            return unescape(value)
+    return None
+
+
+def is_replay_url(href):
+    return "godeebxp.com/egames" in href and "egyptian-mythology" in href
+
+
+def extract_verify_response(html):
+    icons = []
+    replay_urls = []
+    for m in _TAG_PATTERN.finditer(html):
+        tag = m.group(2)
+        if tag is None:
+            continue
+        if tag.lower() == "img":
+            src = _attr(m.group(3), "src")
+            if src:
+                icons.append((src, classify_tier(src)))
+        else:
+            href = _attr(m.group(3), "href")
+            if href is not None and is_replay_url(href):
+                replay_urls.append(href)
+    return icons, replay_urls